@@ -0,0 +1,83 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from metrics import record_retry, get_token_usage_callback
+
+
+# --- LLM Client Pool Configuration ---
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "16"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "120"))
+
+# Status codes the OpenAI SDK retries; each one seen is counted as a retry of the running graph node
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+def _count_retryable_response(response: httpx.Response):
+    if response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500:
+        record_retry()
+
+
+async def _count_retryable_response_async(response: httpx.Response):
+    _count_retryable_response(response)
+
+
+# One connection pool per process, shared by every chat model, so concurrent reports reuse keep-alive connections
+_limits = httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS)
+_http_client = httpx.Client(limits=_limits, timeout=OPENAI_TIMEOUT_SECONDS,
+                            event_hooks={"response": [_count_retryable_response]})
+_http_async_client = httpx.AsyncClient(limits=_limits, timeout=OPENAI_TIMEOUT_SECONDS,
+                                       event_hooks={"response": [_count_retryable_response_async]})
+
+_chat_models: Dict[Tuple[str, float], ChatOpenAI] = {}
+_chat_models_lock = threading.Lock()
+
+
+def get_chat_model(model: str = "gpt-4o", temperature: float = 0) -> ChatOpenAI:
+    """Returns the process-wide chat model for these settings, creating it on first use."""
+    key = (model, temperature)
+    with _chat_models_lock:
+        if key not in _chat_models:
+            _chat_models[key] = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                http_client=_http_client,
+                http_async_client=_http_async_client,
+                callbacks=[get_token_usage_callback()],
+            )
+        return _chat_models[key]
+
+
+class AgentRegistry:
+    """
+    Builds each named agent (prompt template piped into a model) once and hands out the same instance afterwards.
+    Per-request values belong in the prompt's template variables, not in a freshly built agent.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._agents: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        with self._lock:
+            self._factories[name] = factory
+            self._agents.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+        with self._lock:
+            if name not in self._agents:
+                if name not in self._factories:
+                    raise KeyError(f"No agent registered under '{name}'")
+                self._agents[name] = self._factories[name]()
+            return self._agents[name]
+
+
+agent_registry = AgentRegistry()
@@ -0,0 +1,386 @@
+"""
+Offline benchmark for the research and hot topics pipelines.
+
+Tavily, OpenAI, Pexels and the scraped web pages are replaced by deterministic local fakes with configurable latency and
+payload sizes, so throughput can be measured without touching paid services:
+
+    python benchmark.py --scenario all --requests 20 --concurrency 4 --llm-latency 0.5
+"""
+import os
+import re
+import sys
+import copy
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import hashlib
+import resource
+import tempfile
+import statistics
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+
+class BenchmarkConfig:
+    def __init__(self, args: argparse.Namespace):
+        self.llm_latency = args.llm_latency
+        self.search_latency = args.search_latency
+        self.image_latency = args.image_latency
+        self.page_latency = args.page_latency
+        self.page_bytes = args.page_bytes
+        self.results = args.results
+        self.content_chars = args.content_chars
+        self.section_items = args.section_items
+        self.seed = args.seed
+
+
+# --- Fake Backends ---
+class FakeTavilySearch:
+    """Stands in for TavilySearch: returns `results` synthetic hits of `content_chars` characters."""
+
+    name = "tavily_search"
+
+    def __init__(self, config: BenchmarkConfig):
+        self.config = config
+
+    def invoke(self, query: Any) -> Dict[str, Any]:
+        if isinstance(query, dict):
+            query = query.get("query", "")
+        time.sleep(self.config.search_latency)
+        rng = random.Random(f"{self.config.seed}:{query}")
+        words = re.findall(r"\w+", query.lower()) or ["news"]
+        results = []
+        for i in range(self.config.results):
+            body = " ".join(rng.choice(words + list(_FILLER_WORDS)) for _ in range(self.config.content_chars // 6))
+            results.append({
+                "title": f"{query.title()} coverage {i}",
+                "url": f"https://source{i % 7}.example.com/{'-'.join(words)}/{i}",
+                "content": f'Officials said "{query} update {i}" on Tuesday. {body}'[:self.config.content_chars],
+                "score": round(1 - i / (self.config.results + 1), 3),
+                "published_at": (datetime.now(timezone.utc) - timedelta(hours=i)).isoformat(),
+            })
+        return {"query": query, "results": results}
+
+
+_FILLER_WORDS = ("the", "senate", "policy", "economy", "critics", "argue", "however", "report", "million",
+                 "percent", "announced", "statement", "official", "analysts", "warned", "disputed")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model. With tools bound it asks for one tavily_search call (the researcher);
+    otherwise it answers with example JSON (or the structured-output schema filled from it) for whichever
+    report section or hot topics it was asked for.
+    """
+
+    latency: float = 0.0
+    section_items: int = 3
+    bound_tools: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(tool, "name", str(tool)) for tool in tools]
+        return self.model_copy(update={"bound_tools": names})
+
+    def with_structured_output(self, schema, *, method="json_schema", include_raw=False, **kwargs):
+        # Answers with the same example JSON, parsed into the requested schema the way ChatOpenAI would
+        def respond(prompt_value):
+            raw = self.invoke(prompt_value)
+            answer = json.loads(raw.content)
+            parsed = schema.model_validate({"items": answer} if isinstance(answer, list) else answer)
+            return {"raw": raw, "parsed": parsed, "parsing_error": None} if include_raw else parsed
+
+        return RunnableLambda(respond)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        prompt = "\n".join(str(message.content) for message in messages)
+        if self.bound_tools:
+            query = str(messages[-1].content)
+            message = AIMessage(content="", tool_calls=[
+                {"name": "tavily_search", "args": {"query": query}, "id": f"call_{_digest(query)}"},
+            ])
+        else:
+            message = AIMessage(content=json.dumps(self._answer(prompt)))
+        prompt_tokens = len(prompt) // 4
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": len(str(message.content)) // 4,
+            "total_tokens": prompt_tokens + len(str(message.content)) // 4,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _answer(self, prompt: str) -> Any:
+        import research_graph
+        match = re.search(r"Generate the ([a-z ]+?) based on", prompt)
+        if not match:
+            return [
+                {"headline": f"Benchmark headline {i}", "description": "First sentence. Second sentence.",
+                 "category": "General", "source_url": f"https://source{i}.example.com/story"}
+                for i in range(6)
+            ]
+        section = match.group(1).replace(" ", "_")
+        example = copy.deepcopy(research_graph.examples_map[section])
+        if section == "article":
+            example["title"] = f"Benchmark Report {_digest(prompt)}"
+            return example
+        if isinstance(example, list):
+            items = []
+            for i in range(self.section_items):
+                item = copy.deepcopy(example[0])
+                _make_unique(item, i)
+                items.append(item)
+            return items
+        return example
+
+
+def _make_unique(value: Any, index: int):
+    # Distinct quotes and names per item so deduplication does not collapse the fake sections
+    if isinstance(value, dict):
+        for key, inner in value.items():
+            if isinstance(inner, str) and key in ("quote", "name", "source", "conflict_quote", "conflict_id"):
+                value[key] = f"{inner} #{index}"
+            else:
+                _make_unique(inner, index)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+
+
+class FakePageResponse:
+    """Streamed HTML page of roughly `page_bytes` bytes with navigation boilerplate around an <article>."""
+
+    status_code = 200
+    encoding = "utf-8"
+
+    def __init__(self, url: str, page_bytes: int):
+        self.headers = {"Content-Type": "text/html; charset=utf-8", "ETag": f'"{_digest(url)}"'}
+        paragraph = f"<p>Reporting from {url} says the {' '.join(_FILLER_WORDS)} story continues.</p>"
+        body = paragraph * max(1, page_bytes // len(paragraph))
+        self.body = f"<html><body><nav><a href='/'>Home</a></nav><article>{body}</article><footer>About</footer></body></html>".encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakePexelsResponse:
+    status_code = 200
+
+    def __init__(self, query: str):
+        self.query = query
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> Dict[str, Any]:
+        return {"photos": [{"src": {"original": f"https://images.example.com/{_digest(self.query)}.jpg"}}]}
+
+
+def install_fakes(config: BenchmarkConfig):
+    """Swaps every paid backend for a local fake. Must run before main/feed are imported."""
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+    os.environ.setdefault("PEXELS_RATE_LIMIT_PER_HOUR", "100000000")
+    os.environ.setdefault("REPORT_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-"), "reports.db"))
+    os.environ.setdefault("HOT_TOPICS_BACKGROUND_REFRESH", "false")
+    os.environ.setdefault("SCRAPE_CACHE_DIR", tempfile.mkdtemp(prefix="bench-pages-"))
+    os.environ.setdefault("HOT_TOPICS_SNAPSHOT_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-topics-"), "hot_topics.json"))
+
+    import agents
+    fake_llm = FakeChatModel(latency=config.llm_latency, section_items=config.section_items)
+    agents.get_chat_model = lambda model="gpt-4o", temperature=0: fake_llm
+
+    import images
+
+    def fake_pexels_get(url, params=None, timeout=None):
+        time.sleep(config.image_latency)
+        return FakePexelsResponse(params["query"])
+
+    images.image_resolver.api_key = "benchmark"
+    images.image_resolver.session.get = fake_pexels_get
+
+    import scraping
+
+    def fake_page_get(url, headers=None, timeout=None, stream=False):
+        time.sleep(config.page_latency)
+        return FakePageResponse(url, config.page_bytes)
+
+    scraping.scraping_engine.session.get = fake_page_get
+
+    import main
+    import feed
+    research_graph = main.research_pipeline()
+    research_graph.tavily_tool = FakeTavilySearch(config)
+    feed.trending_search = FakeTavilySearch(config)
+    return main, feed
+
+
+# --- Measurement ---
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def bench_graph(main, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Drives graph.invoke directly, `concurrency` runs at a time."""
+    def run(i: int) -> float:
+        started = time.perf_counter()
+        initial_state = {"query": f"benchmark graph query {i}", "messages": [], "scraped_data": [],
+                         "research_report": {}, "image_urls": {}}
+        main.research_pipeline().get_graph().invoke(initial_state, {"recursion_limit": 100})
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(run, range(requests)))
+    return summarize("graph.invoke", latencies, time.perf_counter() - started)
+
+
+async def _drive(client, method: str, urls: List[str], concurrency: int, body_for=None, headers=None) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    responses: List[Optional[Any]] = []
+
+    async def one(i: int, url: str):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            if method == "POST":
+                response = await client.post(url, json=body_for(i))
+            else:
+                response = await client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            responses.append(response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, url) for i, url in enumerate(urls)))
+    return latencies, errors, time.perf_counter() - started, responses
+
+
+async def bench_api(main, requests: int, concurrency: int, reads: int) -> List[Dict[str, Any]]:
+    """Drives the FastAPI endpoints in-process through an ASGI transport."""
+    import httpx
+    transport = httpx.ASGITransport(app=main.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        latencies, errors, elapsed, responses = await _drive(
+            client, "POST", ["/api/research"] * requests, concurrency,
+            body_for=lambda i: {"query": f"benchmark api query {i}"},
+        )
+        results.append(summarize("POST /api/research", latencies, elapsed, errors))
+
+        slugs = [r.json()["slug"] for r in responses if r.status_code == 200]
+        if slugs:
+            urls = [f"/api/article/{slugs[i % len(slugs)]}" for i in range(reads)]
+            latencies, errors, elapsed, _ = await _drive(client, "GET", urls, concurrency)
+            results.append(summarize("GET /api/article/{slug}", latencies, elapsed, errors))
+
+        # The first feed request generates the hot topics; time it separately from the warm reads
+        latencies, errors, elapsed, _ = await _drive(client, "GET", ["/api/feed"], 1)
+        results.append(summarize("GET /api/feed (cold)", latencies, elapsed, errors))
+        latencies, errors, elapsed, responses = await _drive(client, "GET", ["/api/feed"] * reads, concurrency)
+        results.append(summarize("GET /api/feed", latencies, elapsed, errors))
+        # Clients that already hold the current feed revalidate with its ETag and get a bodiless 304
+        etag = responses[0].headers.get("etag") if responses else None
+        if etag:
+            latencies, errors, elapsed, _ = await _drive(client, "GET", ["/api/feed"] * reads, concurrency,
+                                                         headers={"If-None-Match": etag})
+            results.append(summarize("GET /api/feed (304)", latencies, elapsed, errors))
+    return results
+
+
+def print_table(results: List[Dict[str, Any]]):
+    columns = ["scenario", "requests", "errors", "p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "peak_rss_mb"]
+    widths = {column: max(len(column), *(len(str(row[column])) for row in results)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in results:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the research backend against local fakes.")
+    parser.add_argument("--scenario", choices=["graph", "api", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=10, help="research runs per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--reads", type=int, default=200, help="article and feed reads in the api scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake model call")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per fake Tavily search")
+    parser.add_argument("--image-latency", type=float, default=0.1, help="seconds per fake Pexels lookup")
+    parser.add_argument("--page-latency", type=float, default=0.2, help="seconds per fake full-page fetch")
+    parser.add_argument("--page-bytes", type=int, default=50000, help="bytes of HTML per fake page")
+    parser.add_argument("--results", type=int, default=15, help="search results per fake Tavily search")
+    parser.add_argument("--content-chars", type=int, default=1500, help="characters of content per search result")
+    parser.add_argument("--section-items", type=int, default=3, help="items per list section in fake writer output")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    config = BenchmarkConfig(args)
+    main, feed = install_fakes(config)
+    # The uncached path is what we want to measure
+    main.research_cache.ttl_seconds = 0
+
+    results = []
+    if args.scenario in ("graph", "all"):
+        results.append(bench_graph(main, args.requests, args.concurrency))
+    if args.scenario in ("api", "all"):
+        results.extend(asyncio.run(bench_api(main, args.requests, args.concurrency, args.reads)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main_cli()
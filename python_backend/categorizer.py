@@ -0,0 +1,104 @@
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+
+
+# Checked in this order when two categories score the same
+CATEGORY_VOCABULARIES: Dict[str, List[str]] = {
+    "Politics": ["trump", "biden", "congress", "election", "policy", "senate", "house", "democrat", "republican",
+                 "president", "government", "lawmaker", "legislation", "governor", "campaign", "white house"],
+    "Technology": ["ai", "technology", "software", "digital", "tech", "artificial intelligence", "machine learning",
+                   "algorithm", "app", "startup", "innovation", "chip", "semiconductor", "cybersecurity", "robot"],
+    "Business": ["economy", "market", "business", "trade", "economic", "stock", "finance", "investment",
+                 "wall street", "nasdaq", "dow", "s&p", "earnings", "inflation", "tariff", "merger", "bank"],
+    "Health": ["health", "medical", "covid", "vaccine", "diagnosis", "hospital", "doctor", "patient", "treatment",
+               "disease", "medicine", "pharmaceutical", "virus", "outbreak", "fda"],
+    "Environment": ["climate", "environment", "carbon", "emissions", "global warming", "renewable", "solar", "wind",
+                    "pollution", "sustainability", "wildfire", "hurricane", "drought", "flood"],
+    "Sports": ["sport", "football", "basketball", "baseball", "soccer", "olympics", "championship", "tournament",
+               "player", "team", "nfl", "nba", "mlb", "nhl", "world cup", "coach"],
+    "Entertainment": ["movie", "film", "actor", "actress", "hollywood", "entertainment", "music", "singer", "album",
+                      "concert", "award", "oscar", "grammy", "celebrity", "streaming", "box office"],
+    "International": ["war", "military", "defense", "weapon", "conflict", "peace", "diplomacy", "international",
+                      "foreign", "russia", "china", "ukraine", "nato", "united nations", "sanctions", "embassy"],
+    "Education": ["education", "school", "university", "student", "teacher", "college", "degree", "academic",
+                  "research", "study", "campus", "curriculum"],
+}
+CATEGORIES = list(CATEGORY_VOCABULARIES) + ["General"]
+
+# A keyword in the title counts this many times more than one in the summary
+TITLE_WEIGHT = 2
+
+_SEPARATOR = "\n\x00\n"
+
+
+class Categorizer:
+    """
+    Keyword classifier with every category's vocabulary compiled into one word-boundary regex, so a single scan
+    scores all categories at once ("ai" no longer matches "said"). Title and summary both count, the title more.
+    """
+
+    def __init__(self, vocabularies: Dict[str, List[str]] = CATEGORY_VOCABULARIES, title_weight: int = TITLE_WEIGHT):
+        self.categories = list(vocabularies)
+        self.title_weight = title_weight
+        self._keyword_categories: Dict[str, List[int]] = {}
+        for index, words in enumerate(vocabularies.values()):
+            for word in words:
+                self._keyword_categories.setdefault(word.lower(), []).append(index)
+        # Longest keywords first so "artificial intelligence" wins over a shorter overlapping keyword
+        alternation = "|".join(
+            re.escape(word).replace(r"\ ", r"\s+")
+            for word in sorted(self._keyword_categories, key=len, reverse=True)
+        )
+        # Simple plurals ("vaccines", "elections") match their keyword
+        self._pattern = re.compile(rf"(?<!\w)({alternation})(?:s|es)?(?!\w)", re.IGNORECASE)
+
+    def _keyword(self, match: re.Match) -> str:
+        return " ".join(match.group(1).lower().split())
+
+    def _best(self, totals: List[int]) -> str:
+        best = max(range(len(totals)), key=lambda i: (totals[i], -i))
+        return self.categories[best] if totals[best] > 0 else "General"
+
+    def categorize(self, event: Dict[str, Any]) -> str:
+        return self.categorize_events([event])[0]
+
+    def categorize_events(self, events: List[Dict[str, Any]]) -> List[str]:
+        """
+        Categories for a batch of events from a single regex scan over all their titles and summaries.
+        Ties go to the category listed first; events without any keyword are "General".
+        """
+        texts: List[str] = []
+        for event in events:
+            texts.append(event.get("title") or "")
+            texts.append(event.get("summary") or "")
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + len(_SEPARATOR)
+        corpus = _SEPARATOR.join(texts)
+
+        totals = [[0] * len(self.categories) for _ in events]
+        seen = set()
+        for match in self._pattern.finditer(corpus):
+            field = bisect_right(starts, match.start()) - 1
+            keyword = self._keyword(match)
+            if (field, keyword) in seen:
+                continue
+            seen.add((field, keyword))
+            weight = self.title_weight if field % 2 == 0 else 1
+            for category in self._keyword_categories[keyword]:
+                totals[field // 2][category] += weight
+        return [self._best(event_totals) for event_totals in totals]
+
+
+def normalize_category(value: Optional[str]) -> Optional[str]:
+    """Maps a model-supplied category onto a known one (case-insensitively), or None if it is not one of them."""
+    if not value:
+        return None
+    lookup = {category.lower(): category for category in CATEGORIES}
+    return lookup.get(value.strip().lower())
+
+
+categorizer = Categorizer()
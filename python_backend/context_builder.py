@@ -0,0 +1,195 @@
+import os
+import re
+from typing import List, Dict, Any, Tuple
+
+
+# --- Context Budget Configuration ---
+# Approximate number of prompt tokens of scraped content each writer agent receives
+WRITER_CONTEXT_TOKEN_BUDGET = int(os.getenv("WRITER_CONTEXT_TOKEN_BUDGET", "3000"))
+# Passages are cut at paragraph/sentence boundaries into chunks of roughly this many characters
+CONTEXT_CHUNK_CHARS = int(os.getenv("CONTEXT_CHUNK_CHARS", "700"))
+# Passages whose word shingles overlap more than this are treated as the same passage
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_NEAR_DUPLICATE_THRESHOLD", "0.7"))
+
+# Signals that make a passage more useful to a given writer. Each match adds to the passage's score.
+SECTION_SIGNALS = {
+    "timeline_items": re.compile(
+        r"\b(?:19|20)\d{2}\b|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.? \d{1,2}\b"
+        r"|\b(?:announced|signed|passed|voted|introduced|launched|took effect|scheduled|deadline)\b",
+        re.IGNORECASE,
+    ),
+    "raw_facts": re.compile(
+        r"\"|“|\b\d[\d,.]*\s*(?:%|percent|million|billion|trillion)\b|\$\d"
+        r"|\b(?:said|stated|according to|section|provision|bill|act|order|statement|announced)\b",
+        re.IGNORECASE,
+    ),
+    "perspectives": re.compile(
+        r"\"|“|\b(?:critics?|supporters?|argue[sd]?|opinion|editorial|believe[sd]?|praised|slammed|oppos\w+|"
+        r"welcomed|condemned|warned|analysts?|advocates?)\b",
+        re.IGNORECASE,
+    ),
+    "conflicting_info": re.compile(
+        r"\"|“|\b(?:however|but|disput\w+|contradict\w*|den(?:y|ied|ies)|false|misleading|claim\w*|"
+        r"challeng\w+|disagree\w*|inaccurate|fact[- ]check\w*)\b",
+        re.IGNORECASE,
+    ),
+}
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English prose)."""
+    return max(1, len(text) // 4)
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _shingles(words: List[str], size: int = 3) -> set:
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def split_passages(item: Dict[str, Any], chunk_chars: int = CONTEXT_CHUNK_CHARS) -> List[Dict[str, Any]]:
+    """Splits one scraped result into passages at paragraph and sentence boundaries."""
+    content = item.get('content') or ""
+    passages = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n|\n", content):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph] if len(paragraph) <= chunk_chars else _SENTENCE_END_RE.split(paragraph)
+        for piece in pieces:
+            if current and len(current) + len(piece) + 1 > chunk_chars:
+                passages.append(current)
+                current = ""
+            current = f"{current} {piece}".strip()
+    if current:
+        passages.append(current)
+    return [
+        {"url": item['url'], "content": passage, "position": position}
+        for position, passage in enumerate(passages)
+    ]
+
+
+def deduplicate_passages(passages: List[Dict[str, Any]], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> Tuple[List[Dict[str, Any]], int]:
+    """Drops exact and near-identical passages (syndicated copy, repeated boilerplate). Returns (kept, removed_count)."""
+    kept = []
+    kept_shingles = []
+    seen_exact = set()
+    removed = 0
+    for passage in passages:
+        words = _words(passage['content'])
+        exact_key = " ".join(words)
+        if not exact_key or exact_key in seen_exact:
+            removed += 1
+            continue
+        shingles = _shingles(words)
+        is_duplicate = False
+        for other in kept_shingles:
+            overlap = len(shingles & other)
+            if overlap and overlap / min(len(shingles), len(other)) >= threshold:
+                is_duplicate = True
+                break
+        if is_duplicate:
+            removed += 1
+            continue
+        seen_exact.add(exact_key)
+        kept_shingles.append(shingles)
+        passage['words'] = set(words)
+        kept.append(passage)
+    return kept, removed
+
+
+def score_passage(passage: Dict[str, Any], section: str, query_terms: set) -> float:
+    """Relevance of a passage to a section: query overlap, section-specific signals and a lead-paragraph bonus."""
+    score = len(passage['words'] & query_terms) * 2.0
+    signals = SECTION_SIGNALS.get(section)
+    if signals:
+        score += len(signals.findall(passage['content']))
+    if passage['position'] == 0:
+        score += 1.5
+    return score
+
+
+def select_passages(passages: List[Dict[str, Any]], section: str, query_terms: set, budget: int) -> List[Dict[str, Any]]:
+    """Greedily picks the best passages for a section within its token budget, spreading picks across sources."""
+    if section == "cited_sources":
+        # The sources writer needs every URL more than it needs depth, so it gets each source's lead passage
+        ranked = sorted(passages, key=lambda p: (p['position'], -score_passage(p, section, query_terms)))
+    else:
+        ranked = sorted(passages, key=lambda p: score_passage(p, section, query_terms), reverse=True)
+
+    selected = []
+    per_url = {}
+    used = 0
+    deferred = []
+    for passage in ranked:
+        cost = estimate_tokens(passage['content'])
+        if used + cost > budget:
+            continue
+        # Take at most one passage per source on the first sweep so a single long article cannot crowd out the rest
+        if per_url.get(passage['url']):
+            deferred.append(passage)
+            continue
+        selected.append(passage)
+        per_url[passage['url']] = 1
+        used += cost
+    for passage in deferred:
+        cost = estimate_tokens(passage['content'])
+        if used + cost <= budget:
+            selected.append(passage)
+            used += cost
+    return selected
+
+
+def merge_passages(passages: List[Dict[str, Any]], url_order: Dict[str, int]) -> List[Dict[str, str]]:
+    """Reassembles selected passages into scraped_data-shaped items in original source and reading order."""
+    by_url = {}
+    for passage in sorted(passages, key=lambda p: (url_order[p['url']], p['position'])):
+        by_url.setdefault(passage['url'], []).append(passage['content'])
+    return [{"url": url, "content": "\n".join(chunks)} for url, chunks in by_url.items()]
+
+
+def build_section_contexts(scraped_data: List[Dict[str, Any]], query: str, sections: List[str],
+                           budget: int = WRITER_CONTEXT_TOKEN_BUDGET) -> Tuple[Dict[str, List[Dict[str, str]]], Dict[str, Any]]:
+    """
+    Prepares one token-budgeted slice of the scraped corpus per writer section.
+    Returns the slices keyed by section plus statistics on how many prompt tokens were saved.
+    """
+    url_order = {}
+    passages = []
+    for item in scraped_data:
+        if item.get('url') in url_order:
+            continue
+        url_order[item['url']] = len(url_order)
+        passages.extend(split_passages(item))
+
+    unique_passages, removed = deduplicate_passages(passages)
+    query_terms = set(_words(query))
+
+    full_tokens = sum(estimate_tokens(item.get('content') or "") for item in scraped_data)
+    contexts = {}
+    section_tokens = {}
+    for section in sections:
+        selected = select_passages(unique_passages, section, query_terms, budget)
+        contexts[section] = merge_passages(selected, url_order)
+        section_tokens[section] = sum(estimate_tokens(p['content']) for p in selected)
+
+    baseline = full_tokens * len(sections)
+    used = sum(section_tokens.values())
+    stats = {
+        "passages": len(passages),
+        "duplicate_passages_removed": removed,
+        "corpus_tokens": full_tokens,
+        "baseline_prompt_tokens": baseline,
+        "prompt_tokens": used,
+        "tokens_saved": max(0, baseline - used),
+        "section_tokens": section_tokens,
+    }
+    return contexts, stats
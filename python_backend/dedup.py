@@ -0,0 +1,172 @@
+import os
+import re
+import random
+import hashlib
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+# --- Near-Duplicate Detection Configuration ---
+# Share of one text's word shingles found in another above which the two count as the same quote
+QUOTE_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("QUOTE_NEAR_DUPLICATE_THRESHOLD", "0.7"))
+# Quotes with fewer shingles than this only match when one is wholly contained in the other, since a single
+# changed name or word is a large share of a short quote
+QUOTE_SHORT_SHINGLES = int(os.getenv("QUOTE_SHORT_SHINGLES", "8"))
+MINHASH_PERMUTATIONS = 64
+# 32 bands of 2 rows: texts sharing roughly 20% of their shingles become candidates, and are then verified exactly
+LSH_BANDS = 32
+SHINGLE_WORDS = 2
+
+# Each permutation is simulated by XOR-ing the 64-bit shingle hash with a fixed random mask
+_rng = random.Random(1337)
+_PERMUTATION_MASKS = [_rng.getrandbits(64) for _ in range(MINHASH_PERMUTATIONS)]
+
+# Straight and typographic double quotes
+QUOTE_PATTERN = re.compile(r'"([^"]+)"|“([^”]+)”')
+_BRACKETED = re.compile(r"\[[^\]]*\]")
+_ELLIPSIS = re.compile(r"\.\.\.|…")
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+")
+_CAPITALIZED = re.compile(r"\b[A-Z]\w+")
+_SENTENCE_START = re.compile(r"(^|[.!?:\"“(])\s*$")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form for comparing quotes: Unicode-normalized, case-folded, with the edits the quote guide allows
+    (ellipses and square-bracket clarifications) and all punctuation removed.
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = _ELLIPSIS.sub(" ", _BRACKETED.sub(" ", text))
+    return " ".join(_WORD.findall(text))
+
+
+def extract_quotes(text: str) -> List[str]:
+    return [a or b for a, b in QUOTE_PATTERN.findall(text or "")]
+
+
+def quote_details(text: str) -> Set[str]:
+    """Figures and names in a quote: every number, and capitalized words that do not start a sentence."""
+    text = unicodedata.normalize("NFKC", text or "")
+    details = set(_NUMBER.findall(text))
+    for match in _CAPITALIZED.finditer(text):
+        if not _SENTENCE_START.search(text[:match.start()]):
+            details.add(match.group().casefold())
+    return details
+
+
+def shingles(normalized: str, size: int = SHINGLE_WORDS) -> Set[str]:
+    words = normalized.split()
+    if len(words) <= size:
+        return {normalized} if normalized else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(shingle_set: Iterable[str]) -> Tuple[int, ...]:
+    hashes = [_hash64(shingle) for shingle in shingle_set]
+    if not hashes:
+        return ()
+    return tuple(min(h ^ mask for h in hashes) for mask in _PERMUTATION_MASKS)
+
+
+def containment(a: Set[str], b: Set[str]) -> float:
+    """Overlap relative to the smaller set, so a quote trimmed with an ellipsis still matches its full form."""
+    # A two- or three-word fragment is contained in too many unrelated quotes to mean anything
+    if min(len(a), len(b)) < 3:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+class NearDuplicateIndex:
+    """
+    Index of short texts for exact (normalized hash) and near-duplicate (MinHash/LSH) lookups.
+    Adding and querying are both roughly constant time per text, so checking a section against
+    everything already in the report is a single pass.
+    """
+
+    def __init__(self, threshold: float = QUOTE_NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._exact: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._shingles: List[Set[str]] = []
+        self._texts: List[str] = []
+        self.labels: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def _bands(self, signature: Tuple[int, ...]):
+        rows = len(signature) // LSH_BANDS
+        for band in range(LSH_BANDS):
+            yield band, signature[band * rows:(band + 1) * rows]
+
+    def add(self, text: str, label: Any = None) -> int:
+        normalized = normalize_text(text)
+        entry = len(self.labels)
+        self.labels.append(label if label is not None else text)
+        shingle_set = shingles(normalized)
+        self._shingles.append(shingle_set)
+        self._texts.append(text)
+        if not normalized:
+            return entry
+        self._exact.setdefault(normalized, entry)
+        for key in self._bands(minhash(shingle_set)):
+            self._buckets.setdefault(key, []).append(entry)
+        return entry
+
+    def find(self, text: str) -> Optional[Any]:
+        """Label of an indexed text that duplicates or nearly duplicates `text`, or None."""
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        if normalized in self._exact:
+            return self.labels[self._exact[normalized]]
+        shingle_set = shingles(normalized)
+        seen = set()
+        for key in self._bands(minhash(shingle_set)):
+            for entry in self._buckets.get(key, ()):
+                if entry in seen:
+                    continue
+                seen.add(entry)
+                if self._is_near_duplicate(text, shingle_set, entry):
+                    return self.labels[entry]
+        return None
+
+    def _is_near_duplicate(self, text: str, shingle_set: Set[str], entry: int) -> bool:
+        return containment(shingle_set, self._shingles[entry]) >= self.threshold
+
+
+class QuoteIndex(NearDuplicateIndex):
+    """
+    Every quote already used in a report, labelled with where it appears. Near-duplicate quotes must also
+    agree on their figures and names, and short quotes must match in full.
+    """
+
+    @classmethod
+    def from_report(cls, research_report: Dict[str, Any]) -> "QuoteIndex":
+        index = cls()
+        for fact_group in research_report.get('raw_facts') or []:
+            for fact in fact_group.get('facts') or []:
+                for quote in extract_quotes(fact):
+                    index.add(quote, "raw_facts")
+        for perspective in research_report.get('perspectives') or []:
+            for field in ('quote', 'conflict_quote'):
+                if perspective.get(field):
+                    index.add(perspective[field], "perspectives")
+        for item in research_report.get('timeline_items') or []:
+            for quote in extract_quotes(item.get('description')):
+                index.add(quote, "timeline_items")
+        return index
+
+    def _is_near_duplicate(self, text: str, shingle_set: Set[str], entry: int) -> bool:
+        other = self._shingles[entry]
+        shorter, longer = (text, self._texts[entry]) if len(shingle_set) <= len(other) else (self._texts[entry], text)
+        # A changed figure or name makes it a different claim; a trimmed quote may drop details, but not add new ones
+        if not quote_details(shorter) <= quote_details(longer):
+            return False
+        threshold = 1.0 if min(len(shingle_set), len(other)) < QUOTE_SHORT_SHINGLES else self.threshold
+        return containment(shingle_set, other) >= threshold
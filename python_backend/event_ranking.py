@@ -0,0 +1,100 @@
+import os
+import math
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+from dedup import NearDuplicateIndex
+from search import domain_of
+
+
+# --- Event Ranking Configuration ---
+# Stories handed to the hot topic generator
+HOT_TOPICS_MAX_EVENTS = int(os.getenv("HOT_TOPICS_MAX_EVENTS", "8"))
+# Shingle overlap above which two events are treated as the same story
+EVENT_DUPLICATE_THRESHOLD = float(os.getenv("EVENT_DUPLICATE_THRESHOLD", "0.5"))
+# Recency score halves every this many hours; events older than the max age are dropped
+EVENT_RECENCY_HALF_LIFE_HOURS = float(os.getenv("EVENT_RECENCY_HALF_LIFE_HOURS", "12"))
+EVENT_MAX_AGE_HOURS = float(os.getenv("EVENT_MAX_AGE_HOURS", "72"))
+# Each further story from an already selected source has its score multiplied by this
+SOURCE_REPEAT_PENALTY = 0.5
+
+# Characters of the summary compared when clustering; the lead carries the story
+_SUMMARY_CHARS = 300
+
+
+def parse_published_at(value: Any) -> Optional[datetime]:
+    """Timezone-aware datetime from ISO 8601 or RFC 2822 strings, or None when it cannot be parsed."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value.strip():
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+    else:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def age_hours(event: Dict[str, Any], now: Optional[datetime] = None) -> Optional[float]:
+    published = parse_published_at(event.get("published_at"))
+    if published is None:
+        return None
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (now - published).total_seconds() / 3600)
+
+
+def recency_score(event: Dict[str, Any], now: Optional[datetime] = None) -> float:
+    """1.0 for a story published now, halving every half-life; 0.5 when the date is unknown."""
+    age = age_hours(event, now)
+    if age is None:
+        return 0.5
+    return 0.5 ** (age / EVENT_RECENCY_HALF_LIFE_HOURS)
+
+
+def event_source(event: Dict[str, Any]) -> str:
+    return (event.get("source") or domain_of(event.get("url") or "")).lower()
+
+
+def cluster_events(events: List[Dict[str, Any]], threshold: float = EVENT_DUPLICATE_THRESHOLD) -> List[List[Dict[str, Any]]]:
+    """Groups copies of the same story (near-duplicate title plus summary lead) in one pass over the events."""
+    index = NearDuplicateIndex(threshold)
+    clusters: List[List[Dict[str, Any]]] = []
+    for event in events:
+        text = f"{event.get('title', '')} {(event.get('summary') or '')[:_SUMMARY_CHARS]}"
+        cluster = index.find(text)
+        if cluster is None:
+            cluster = len(clusters)
+            clusters.append([])
+        clusters[cluster].append(event)
+        index.add(text, cluster)
+    return clusters
+
+
+def rank_events(events: List[Dict[str, Any]], limit: int = HOT_TOPICS_MAX_EVENTS,
+                now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    One representative event per story, best first: stories are scored by recency and by how many
+    sources carry them, then picked greedily with a penalty for sources that already have a story.
+    """
+    now = now or datetime.now(timezone.utc)
+    candidates = []
+    for cluster in cluster_events(events):
+        # The freshest, most detailed copy represents the story
+        representative = max(cluster, key=lambda event: (recency_score(event, now), len(event.get("summary") or "")))
+        score = recency_score(representative, now) * (1 + math.log(len({event_source(event) for event in cluster})))
+        candidates.append((score, representative, len(cluster)))
+
+    selected = []
+    source_counts: Dict[str, int] = {}
+    while candidates and len(selected) < limit:
+        best = max(range(len(candidates)), key=lambda i: candidates[i][0] * SOURCE_REPEAT_PENALTY ** source_counts.get(event_source(candidates[i][1]), 0))
+        _, representative, coverage = candidates.pop(best)
+        source = event_source(representative)
+        source_counts[source] = source_counts.get(source, 0) + 1
+        selected.append({**representative, "coverage": coverage})
+    return selected
@@ -2,24 +2,39 @@ import os
 import re
 import json
 import uuid
-from datetime import datetime, timedelta
-from fastapi import FastAPI, HTTPException
+import random
+import time
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional, TypedDict, Annotated
 from langchain_tavily import TavilySearch
 from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END, START
 from langgraph.prebuilt import ToolNode
 from dotenv import load_dotenv
 import requests
-from bs4 import BeautifulSoup
 from langchain_core.tools import tool
-from pexelsapi.pexels import Pexels
 
+# Load .env before the local modules below read their configuration from the environment
 load_dotenv()
 
+from images import image_resolver
+from agents import agent_registry, get_chat_model
+from metrics import instrument_node, start_trace
+from json_repair import extract_json, JSONRepairError
+from categorizer import categorizer, normalize_category
+from ingestion import ingest, build_sources, TRENDING_SOURCES
+from event_ranking import rank_events, age_hours, EVENT_MAX_AGE_HOURS, HOT_TOPICS_MAX_EVENTS
+from topic_diff import diff_events, event_identity, unwritten_topics, HOT_TOPICS_MAX_TOPICS
+from search import canonicalize_url
+from responses import PrecomputedBody
+from shared_snapshot import SharedSnapshot
+from research_service import research_cache, enqueue_research
+from jobs import SchedulerSaturated
+
 
 
 # Typed Dict is a python hint statement
@@ -37,6 +52,10 @@ class HotTopicState(TypedDict):
     hot_topics: Annotated[Optional[dict], merge_reports] # Stores the final generated hot topics, has a merge reports function that stores multiple topics
     image_urls: Optional[dict] # Has optional parameters and stores image URLs for each hot topics
     generated_at: str # TimeStamp of when hot topics were generated
+    previous_topics: List[Dict[str, Any]] # topics currently being served, diffed against the new events
+    kept_topics: List[Dict[str, Any]] # existing topics whose story is still running unchanged
+    pending_events: List[Dict[str, Any]] # new or materially changed events that need a topic written
+    carried_topics: List[Dict[str, Any]] # existing topics not seen this refresh that have not expired
 
 
 ''' Example of State: 
@@ -56,92 +75,44 @@ class HotTopicState(TypedDict):
 # Now we must define the tools - the functions that your AI agents can call to perform specific tasks
 
 # Fetches current trending news from TavilySearch
+trending_search = TavilySearch(max_results=12)
+
 @tool
 def get_trending_news() -> List[Dict[str, Any]]:
-    """Fetches trending news from TavilySearch."""
-    tavily = TavilySearch(max_results=12)
-    # Use a generic trending news query
-    query = "trending news today"
-    try:
-        results = tavily.invoke(query)
-        # Tavily may return a list or dict with 'results' key
-        if isinstance(results, dict):
-            articles = results.get('results', [])
-        elif isinstance(results, list):
-            articles = results
-        else:
-            articles = []
-        news = []
-        for article in articles:
-            news.append({
-                "title": article.get("title", "Untitled"),
-                "url": article.get("url", ""),
-                "source": article.get("source", ""),
-                "published_at": article.get("published_at", datetime.now().isoformat()),
-                "summary": article.get("content", article.get("description", "")),
-            })
-        return news
-    except Exception as e:
-        print(f"Error fetching trending news from Tavily: {e}")
-        return []
+    """Fetches trending news from every configured source (Tavily queries, RSS/Atom feeds, fixture files)."""
+    # Sources run concurrently, each under its own timeout; see ingestion.py and TRENDING_SOURCES
+    return ingest(build_sources(TRENDING_SOURCES, trending_search))
 
 
 
 
 def is_newsworthy(event: Dict[str, Any]) -> bool:
     """Determines if an event is newsworthy based on criteria."""
-    # Check if it's recent (within last 24 hours)
-    # Check if it has broad impact
-    # Check if it's from reliable sources
-    # For now, return True for all events - in production, implement real filtering
-    return True
+    # It needs a real headline and something to link or summarize
+    if len((event.get("title") or "").split()) < 3 or event.get("title") == "Untitled":
+        return False
+    if not (event.get("url") or event.get("summary")):
+        return False
+    # Stories past the maximum age are not trending any more (undated ones get the benefit of the doubt)
+    age = age_hours(event)
+    return age is None or age <= EVENT_MAX_AGE_HOURS
 
 @tool
 def filter_relevant_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Filters events for relevance and newsworthiness."""
-    relevant_events = []
-   
-    for event in events:
-        # Filter criteria:
-        # - Is it recent (last 24 hours)?
-        # - Does it have broad impact?
-        # - Is it from reliable sources?
-        # - Is it not duplicate content?
-        
-        if is_newsworthy(event):
-            relevant_events.append(event)
-    
-    return relevant_events[:8]  # Return top 8 most relevant for hot topics                  
+    relevant_events = [event for event in events if is_newsworthy(event)]
+    # Copies of the same story collapse into one, ranked by recency and coverage with source diversity
+    ranked = rank_events(relevant_events, HOT_TOPICS_MAX_EVENTS)
+    print(f"--- 🧮 {len(events)} EVENTS, {len(relevant_events)} NEWSWORTHY, KEEPING {len(ranked)} DISTINCT STORIES ---")
+    return ranked
 
 
 
 @tool
 def categorize_event(event: Dict[str, Any]) -> str:
     """Categorizes an event into Politics, Technology, etc."""
-    title = event.get("title", "").lower()
-    summary = event.get("summary", "").lower()
-    
-    # Enhanced keyword-based categorization
-    if any(word in title for word in ["trump", "biden", "congress", "election", "policy", "senate", "house", "democrat", "republican", "president", "government"]):
-        return "Politics"
-    elif any(word in title for word in ["ai", "technology", "software", "digital", "tech", "artificial intelligence", "machine learning", "algorithm", "app", "startup", "innovation"]):
-        return "Technology"
-    elif any(word in title for word in ["economy", "market", "business", "trade", "economic", "stock", "finance", "investment", "wall street", "nasdaq", "dow", "s&p"]):
-        return "Business"
-    elif any(word in title for word in ["health", "medical", "covid", "vaccine", "diagnosis", "hospital", "doctor", "patient", "treatment", "disease", "medicine", "pharmaceutical"]):
-        return "Health"
-    elif any(word in title for word in ["climate", "environment", "carbon", "emissions", "global warming", "renewable", "solar", "wind", "pollution", "sustainability"]):
-        return "Environment"
-    elif any(word in title for word in ["sport", "football", "basketball", "baseball", "soccer", "olympics", "championship", "tournament", "player", "team", "nfl", "nba", "mlb"]):
-        return "Sports"
-    elif any(word in title for word in ["movie", "film", "actor", "actress", "hollywood", "entertainment", "music", "singer", "album", "concert", "award", "oscar", "grammy"]):
-        return "Entertainment"
-    elif any(word in title for word in ["war", "military", "defense", "weapon", "conflict", "peace", "diplomacy", "international", "foreign", "russia", "china", "ukraine"]):
-        return "International"
-    elif any(word in title for word in ["education", "school", "university", "student", "teacher", "college", "degree", "academic", "research", "study"]):
-        return "Education"
-    else:
-        return "General"
+    # One compiled word-boundary scan scores every category from the title and summary
+    return categorizer.categorize(event)
     
 
 
@@ -154,7 +125,7 @@ HOT_TOPIC_PROMPT = """You are a hot topic generator. Your job is to:
 2. Write 2-sentence descriptions that capture the essence
 3. Ensure topics are newsworthy and current
 4. Make headlines engaging but factual
-5. Generate 6-8 diverse topics across different categories
+5. Generate exactly one topic per event, keeping each topic's source_url set to its event's URL
 6. Focus on stories with broad impact and public interest
 
 You MUST generate a valid JSON output that strictly follows the structure below.
@@ -178,7 +149,7 @@ Do not add any commentary, explanations, or any text outside of the JSON output.
 ]
 ```
 
-Now, using the provided trending events, generate exactly 6-8 diverse hot topics. Adhere to the example format precisely and ensure all categories are varied.
+Now, using the provided trending events, generate exactly one hot topic per event. Adhere to the example format precisely.
 """
 
 # Event Filter Agent
@@ -224,6 +195,13 @@ def create_category_agent(llm, tools):
     ])
     return prompt | llm.bind_tools(tools)
 
+# Agents are built once per process and reused by every refresh
+agent_registry.register(
+    "hot_topic_generator",
+    lambda: create_hot_topic_agent(get_chat_model("gpt-4o", temperature=0.7),
+                                   [get_trending_news, filter_relevant_events, categorize_event]),
+)
+
 # Node Functions
 def trending_news_node(state: HotTopicState):
     """Fetches trending news from various sources."""
@@ -235,26 +213,58 @@ def event_filter_node(state: HotTopicState):
     """Filters and prioritizes events."""
     print("--- 🔍 FILTERING EVENTS ---")
     filtered_events = filter_relevant_events.invoke({"events": state['trending_events']})
+    # Categorize the whole batch locally so the generator only has to confirm a category
+    for event, category in zip(filtered_events, categorizer.categorize_events(filtered_events)):
+        event["category"] = category
     return {"trending_events": filtered_events, "messages": []}
 
+def event_diff_node(state: HotTopicState):
+    """Splits the filtered events into stories already covered by a topic and ones that need writing."""
+    kept, pending, carried = diff_events(state['trending_events'], state.get('previous_topics', []))
+    changed = sum(1 for event in pending if event.get('topic_id'))
+    print(f"--- ♻️ {len(kept)} TOPICS UNCHANGED, {len(pending)} TO WRITE ({changed} CHANGED), {len(carried)} CARRIED OVER ---")
+    return {"kept_topics": kept, "pending_events": pending, "carried_topics": carried, "messages": []}
+
+def route_after_diff(state: HotTopicState) -> str:
+    # Nothing new or changed: skip the model and image lookups entirely
+    return "hot_topic_generator" if state.get('pending_events') else "aggregator"
+
+def match_topics_to_events(topics: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    The event each generated topic was written from: by canonical source URL, else by position.
+    Each event goes to at most one topic; a topic left without one gets None.
+    """
+    by_url = {canonicalize_url(event['url']): event for event in events if event.get('url')}
+    matched: List[Optional[Dict[str, Any]]] = [None] * len(topics)
+    used = set()
+    for i, topic in enumerate(topics):
+        event = by_url.get(canonicalize_url(topic['source_url'])) if topic.get('source_url') else None
+        if event is not None and id(event) not in used:
+            matched[i] = event
+            used.add(id(event))
+    # Positional fallback only for topics whose URL matched nothing, and only to events not already taken
+    for i in range(min(len(topics), len(events))):
+        if matched[i] is None and id(events[i]) not in used:
+            matched[i] = events[i]
+            used.add(id(events[i]))
+    return matched
+
 def hot_topic_generator_node(state: HotTopicState):
-    """Generates hot topic headlines and descriptions."""
+    """Generates hot topic headlines and descriptions for new or changed events."""
     print("--- ✍️ GENERATING HOT TOPICS ---")
     
-    # Create agent
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
-    tools = [get_trending_news, filter_relevant_events, categorize_event]
-    agent = create_hot_topic_agent(llm, tools)
+    agent = agent_registry.get("hot_topic_generator")
+    events = state.get('pending_events', [])
     
     # Prepare message with events
     events_text = "\n\n".join([
-        f"Title: {event['title']}\nSummary: {event['summary']}\nSource: {event['source']}"
-        for event in state['trending_events']
+        f"Title: {event['title']}\nSummary: {event['summary']}\nSource: {event['source']}\nURL: {event['url']}\nCategory: {event.get('category', 'General')}"
+        for event in events
     ])
-    print(f"--- EVENTS BEING SENT TO AGENT: {len(state['trending_events'])} events ---")
+    print(f"--- EVENTS BEING SENT TO AGENT: {len(events)} events ---")
     print(f"Events text preview: {events_text[:200]}...")
     
-    message = HumanMessage(content=f"Generate 6-8 diverse hot topics from these events, ensuring variety across different categories:\n\n{events_text}")
+    message = HumanMessage(content=f"Generate one hot topic for each of these {len(events)} events:\n\n{events_text}")
     print(f"--- SENDING MESSAGE TO AGENT ---")
     print(f"Message: {message.content[:200]}...")
     result = agent.invoke({"messages": [message]})
@@ -274,34 +284,36 @@ def hot_topic_generator_node(state: HotTopicState):
         print(data_str)
         print(f"--- END RAW RESPONSE FOR HOT TOPICS ---")
             
-        # Clean the string if it's wrapped in markdown
-        if data_str.strip().startswith("```"):
-            match = re.search(r'```(json)?\s*\n(.*?)\n\s*```', data_str, re.DOTALL)
-            if match:
-                data_str = match.group(2)
-        
-        # Clean up the JSON string
-        data_str = data_str.strip()
-        if not data_str.startswith('['):
-            # If it's not an array, try to wrap it
-            if data_str.startswith('{'):
-                data_str = '[' + data_str + ']'
-        
-        hot_topics = json.loads(data_str)
+        # Fences, surrounding prose, trailing commas and truncated output are tolerated
+        hot_topics = extract_json(data_str)
         
         # Ensure it's in the right format
         if isinstance(hot_topics, list):
             topics_data = {"topics": hot_topics}
+        elif "topics" not in hot_topics:
+            # A single topic object
+            topics_data = {"topics": [hot_topics]}
         else:
             topics_data = hot_topics
             
+        # Remember which story each topic came from; a changed story keeps its topic's id and image
+        topics_data["topics"] = [
+            {**topic, **event_identity(event), "id": event.get('topic_id'), "image_url": event.get('image_url')}
+            if event is not None else topic
+            for topic, event in zip(topics_data["topics"], match_topics_to_events(topics_data["topics"], events))
+        ]
+            
         print(f"--- ✅ HOT TOPICS PARSED SUCCESSFULLY ---")
         return {"hot_topics": topics_data, "messages": [result]}
-    except (json.JSONDecodeError, AttributeError) as e:
+    except (JSONRepairError, AttributeError) as e:
         # Handle parsing errors or if the content is not what we expect
         error_message = f"Error parsing hot topics: {e}"
         print(f"--- ❌ ERROR PARSING HOT TOPICS: {error_message} ---")
         print(f"Content was: {data_str[:200]}...")
+        if state.get('previous_topics'):
+            # The existing topics are still being served (changed stories keep theirs in the aggregator);
+            # leave the new stories for the next refresh
+            return {"hot_topics": {"topics": []}, "messages": [result]}
         # Return a fallback structure
         fallback_topics = {
             "topics": [
@@ -319,85 +331,145 @@ def image_fetcher_node(state: HotTopicState):
     """Fetches images for hot topics."""
     print("--- 🖼️ FETCHING IMAGES ---")
     
-    # Initialize Pexels API
-    PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
-    if PEXELS_API_KEY:
-        pexels_api = Pexels(PEXELS_API_KEY)
-    else:
-        pexels_api = None
-    
     image_urls = {}
     
     if state.get('hot_topics') and 'topics' in state['hot_topics']:
-        for i, topic in enumerate(state['hot_topics']['topics']):
-            if pexels_api:
-                try:
-                    search_photos = pexels_api.search_photos(topic['headline'], page=1, per_page=1)
-                    if search_photos['photos']:
-                        image_urls[f"topic_{i}"] = search_photos['photos'][0]['src']['original']
-                    else:
-                        image_urls[f"topic_{i}"] = "https://images.pexels.com/photos/12345/news-image.jpg"
-                except Exception as e:
-                    print(f"Error fetching image for topic {i}: {e}")
-                    image_urls[f"topic_{i}"] = "https://images.pexels.com/photos/12345/news-image.jpg"
-            else:
-                image_urls[f"topic_{i}"] = "https://images.pexels.com/photos/12345/news-image.jpg"
+        # Every headline without an image yet is resolved concurrently through the shared, cached image resolver
+        missing = [i for i, topic in enumerate(state['hot_topics']['topics']) if not topic.get('image_url')]
+        headlines = [state['hot_topics']['topics'][i]['headline'] for i in missing]
+        for i, url in zip(missing, image_resolver.resolve_many(headlines)):
+            image_urls[f"topic_{i}"] = url or "https://images.pexels.com/photos/12345/news-image.jpg"
     
     return {"image_urls": image_urls, "messages": []}
 
 def aggregator_node(state: HotTopicState):
-    """Combines all data into final hot topics."""
+    """Combines newly written topics with the unchanged and carried-over ones into the final hot topics."""
     print("--- 📊 AGGREGATING HOT TOPICS ---")
     
     # Combine hot topics with images
     final_topics = []
-    if state.get('hot_topics') and 'topics' in state['hot_topics']:
-        for i, topic in enumerate(state['hot_topics']['topics']):
+    last_seen_at = datetime.now(timezone.utc).isoformat()
+    if state.get('pending_events') and state.get('hot_topics') and 'topics' in state['hot_topics']:
+        topics = state['hot_topics']['topics']
+        event_categories = {event.get('url'): event.get('category') for event in state.get('trending_events', [])}
+        local_categories = categorizer.categorize_events(
+            [{"title": topic.get('headline'), "summary": topic.get('description')} for topic in topics])
+        for i, topic in enumerate(topics):
+            # Keep the model's category when it is a known one, else use the source event's or a local classification
+            category = (normalize_category(topic.get('category')) or event_categories.get(topic.get('source_url'))
+                        or local_categories[i])
             topic_with_image = {
                 **topic,
-                "id": str(uuid.uuid4()),
-                "image_url": state.get('image_urls', {}).get(f"topic_{i}", "https://images.pexels.com/photos/12345/news-image.jpg"),
-                "generated_at": state.get('generated_at', datetime.now().isoformat())
+                "category": category,
+                "id": topic.get('id') or str(uuid.uuid4()),
+                "image_url": topic.get('image_url') or state.get('image_urls', {}).get(f"topic_{i}", "https://images.pexels.com/photos/12345/news-image.jpg"),
+                "generated_at": state.get('generated_at', datetime.now().isoformat()),
+                "last_seen_at": last_seen_at
             }
             final_topics.append(topic_with_image)
     
-    return {"hot_topics": {"topics": final_topics}, "messages": []}
+    # Changed stories the generator wrote nothing for keep their previous topic
+    unwritten = unwritten_topics(state.get('pending_events', []), final_topics)
+    if unwritten:
+        print(f"--- ♻️ KEEPING {len(unwritten)} PREVIOUS TOPICS FOR CHANGED STORIES WITHOUT A NEW TOPIC ---")
+    
+    # New and changed stories first, then the ones still running, then recent ones that dropped out of the ranking
+    final_topics = final_topics + unwritten + state.get('kept_topics', []) + state.get('carried_topics', [])
+    return {"hot_topics": {"topics": final_topics[:HOT_TOPICS_MAX_TOPICS]}, "messages": []}
 
 # Graph Construction
 def create_hot_topics_workflow():
     """Creates and returns the hot topics workflow graph."""
-    # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
-    
     # Build graph
     workflow = StateGraph(HotTopicState)
     
     # Add nodes
-    workflow.add_node("trending_news", trending_news_node)
-    workflow.add_node("event_filter", event_filter_node)
-    workflow.add_node("hot_topic_generator", hot_topic_generator_node)
-    workflow.add_node("image_fetcher", image_fetcher_node)
-    workflow.add_node("aggregator", aggregator_node)
+    workflow.add_node("trending_news", instrument_node("hot_topics", "trending_news", trending_news_node))
+    workflow.add_node("event_filter", instrument_node("hot_topics", "event_filter", event_filter_node))
+    workflow.add_node("event_diff", instrument_node("hot_topics", "event_diff", event_diff_node))
+    workflow.add_node("hot_topic_generator", instrument_node("hot_topics", "hot_topic_generator", hot_topic_generator_node))
+    workflow.add_node("image_fetcher", instrument_node("hot_topics", "image_fetcher", image_fetcher_node))
+    workflow.add_node("aggregator", instrument_node("hot_topics", "aggregator", aggregator_node))
     
     # Add edges
     workflow.add_edge(START, "trending_news")
     workflow.add_edge("trending_news", "event_filter")
-    workflow.add_edge("event_filter", "hot_topic_generator")
+    workflow.add_edge("event_filter", "event_diff")
+    workflow.add_conditional_edges("event_diff", route_after_diff, ["hot_topic_generator", "aggregator"])
     workflow.add_edge("hot_topic_generator", "image_fetcher")
     workflow.add_edge("image_fetcher", "aggregator")
     workflow.add_edge("aggregator", END)
     
     return workflow.compile()
 
+# Feed View
+DEFAULT_HERO_IMAGE_URL = "https://images.pexels.com/photos/12345/news-image.jpg"
+_SLUG_SEPARATORS = re.compile(r"[ /]")
+
+def topic_to_article(topic: Dict[str, Any], built_at: str) -> Dict[str, Any]:
+    """Maps a backend topic onto the frontend FeedArticle fields."""
+    return {
+        "id": topic.get("id") or str(uuid.uuid4()),
+        "title": topic.get("headline", "Untitled Topic"),
+        "slug": _SLUG_SEPARATORS.sub("-", topic.get("headline", "untitled-topic").lower()),
+        "excerpt": topic.get("description", "No description available."),
+        "category": topic.get("category", "General"),
+        "publishedAt": topic.get("generated_at", built_at),
+        "readTime": 2,  # Default/fake value
+        "sourceCount": 1,  # Default/fake value
+        "heroImageUrl": topic.get("image_url", DEFAULT_HERO_IMAGE_URL),
+        "authorName": "AI Agent",
+        "authorTitle": "Hot Topics Generator"
+    }
+
+def build_feed_snapshot(topics_data: Dict[str, Any]) -> PrecomputedBody:
+    """The /api/feed response for a topics snapshot, serialized and compressed once per generation."""
+    built_at = datetime.now().isoformat()
+    articles = [topic_to_article(topic, built_at) for topic in topics_data.get('topics', [])]
+    return PrecomputedBody(json.dumps(articles, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
 # Hot Topics Manager
+# How often the background refresher regenerates topics, plus a random +/- jitter so workers do not refresh in lockstep.
+# Every refresh runs each trending source's search (billed per query) and a model call when stories changed.
+HOT_TOPICS_REFRESH_SECONDS = float(os.getenv("HOT_TOPICS_REFRESH_SECONDS", "3600"))
+HOT_TOPICS_REFRESH_JITTER_SECONDS = float(os.getenv("HOT_TOPICS_REFRESH_JITTER_SECONDS", "60"))
+HOT_TOPICS_RETRY_SECONDS = float(os.getenv("HOT_TOPICS_RETRY_SECONDS", "60"))
+HOT_TOPICS_BACKGROUND_REFRESH = os.getenv("HOT_TOPICS_BACKGROUND_REFRESH", "true").lower() in ("1", "true", "yes")
+# Every worker on the host serves the snapshot in this file and only the worker holding its lock regenerates it;
+# set it empty to give each process its own topics. Workers look for a newer snapshot at most this often.
+HOT_TOPICS_SNAPSHOT_PATH = os.getenv("HOT_TOPICS_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hot_topics.json"))
+HOT_TOPICS_SNAPSHOT_CHECK_SECONDS = float(os.getenv("HOT_TOPICS_SNAPSHOT_CHECK_SECONDS", "2"))
+# After each refresh, queue research for this many of the top topics so a click finds the report ready (0 = off)
+HOT_TOPICS_PREFETCH_TOP_K = int(os.getenv("HOT_TOPICS_PREFETCH_TOP_K", "0"))
+
 class HotTopicsManager:
-    def __init__(self):
-        self.workflow = create_hot_topics_workflow()
+    def __init__(self, refresh_interval: float = HOT_TOPICS_REFRESH_SECONDS,
+                 refresh_jitter: float = HOT_TOPICS_REFRESH_JITTER_SECONDS,
+                 snapshot_path: Optional[str] = HOT_TOPICS_SNAPSHOT_PATH):
+        self._workflow = None
+        self._workflow_lock = threading.Lock()
         self.cache = {}
+        self.topics_by_id: Dict[str, Dict[str, Any]] = {}
         self.last_generated = None
+        self.feed_snapshot = build_feed_snapshot(self.cache)
+        self.refresh_interval = refresh_interval
+        self.refresh_jitter = refresh_jitter
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresher = None
+        self.shared = SharedSnapshot(snapshot_path) if snapshot_path else None
+        self._next_shared_check = 0.0
+    
+    @property
+    def workflow(self):
+        """The hot topics graph, compiled on first use rather than when the module is imported."""
+        with self._workflow_lock:
+            if self._workflow is None:
+                self._workflow = create_hot_topics_workflow()
+            return self._workflow
     
     def generate_daily_topics(self):
-        """Runs the workflow to generate 4 new hot topics."""
+        """Runs the workflow, writing topics only for stories that are new or changed since the last run."""
         print("--- 🚀 GENERATING DAILY HOT TOPICS ---")
         
         initial_state = {
@@ -405,90 +477,145 @@ class HotTopicsManager:
             "trending_events": [],
             "hot_topics": {},
             "image_urls": {},
-            "generated_at": datetime.now().isoformat()
+            "generated_at": datetime.now().isoformat(),
+            # Stories that already have a topic keep it; only new or changed ones are written
+            "previous_topics": self.cache.get('topics', [])
         }
         
-        final_state = self.workflow.invoke(initial_state)
+        with start_trace("hot_topics") as trace:
+            final_state = self.workflow.invoke(initial_state)
+        print(f"--- 🧭 HOT TOPICS TRACE: {trace.trace_id} ---")
+        topics = final_state.get('hot_topics', {})
+        
+        # Keep serving the last good snapshot if this run came back empty
+        if not topics.get('topics') and self.cache:
+            print("--- ⚠️ GENERATION RETURNED NO TOPICS, KEEPING PREVIOUS SNAPSHOT ---")
+            return self.cache
         
-        # Cache the results
-        self.cache = final_state.get('hot_topics', {})
-        self.last_generated = datetime.now()
+        self._apply(topics, datetime.now())
+        if self.shared:
+            # Publish to the other workers on this host
+            self.shared.write({"topics": topics, "last_generated": self.last_generated.isoformat()})
         
         print(f"--- ✅ GENERATED {len(self.cache.get('topics', []))} HOT TOPICS ---")
+        self.prefetch_research()
         return self.cache
     
+    def _apply(self, topics: Dict[str, Any], generated: datetime):
+        # Cache the results, with the feed response materialized once for every request until the next run
+        self.feed_snapshot = build_feed_snapshot(topics)
+        self.topics_by_id = {topic['id']: topic for topic in topics.get('topics', []) if topic.get('id')}
+        self.cache = topics
+        self.last_generated = generated
+    
+    def sync_shared(self, force: bool = False):
+        """Adopts a snapshot another worker published since we last looked (checked at most every few seconds)."""
+        if not self.shared:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_shared_check:
+            return
+        self._next_shared_check = now + HOT_TOPICS_SNAPSHOT_CHECK_SECONDS
+        document = self.shared.read_if_changed()
+        if document and document.get("topics", {}).get("topics"):
+            self._apply(document["topics"], datetime.fromisoformat(document["last_generated"]))
+            print(f"--- 📂 LOADED {len(self.cache['topics'])} HOT TOPICS FROM THE SHARED SNAPSHOT ---")
+    
+    def refresh(self, wait: bool = True):
+        """
+        Regenerates topics unless a regeneration is already running (single-flight).
+        With wait=True a caller that finds one running blocks until it finishes; otherwise it returns immediately.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            if wait:
+                with self._refresh_lock:
+                    pass
+            return self.cache
+        try:
+            # Across processes the shared snapshot's lock elects the one worker that regenerates
+            with (self.shared.exclusive(blocking=wait) if self.shared else nullcontext(True)) as elected:
+                if not elected:
+                    return self.cache
+                # Another worker may have published while we waited for the lock
+                self.sync_shared(force=True)
+                if self.cache and not self.is_stale():
+                    return self.cache
+                return self.generate_daily_topics()
+        except Exception as e:
+            print(f"--- ❌ HOT TOPICS REFRESH FAILED, SERVING PREVIOUS SNAPSHOT: {e} ---")
+            return self.cache
+        finally:
+            self._refresh_lock.release()
+    
+    def is_stale(self) -> bool:
+        return (self.last_generated is None or
+                datetime.now() - self.last_generated > timedelta(seconds=self.refresh_interval))
+    
     def get_cached_topics(self):
-        """Returns cached hot topics or generates new ones."""
-        # Check if we need to generate new topics (every 24 hours)
-        if (self.last_generated is None or 
-            datetime.now() - self.last_generated > timedelta(hours=24) or
-            not self.cache):
-            return self.generate_daily_topics()
+        """Returns the last good topics snapshot without waiting for regeneration (stale-while-revalidate)."""
+        self.sync_shared()
+        if not self.cache:
+            # Nothing to serve yet: the first callers wait for (or join) the initial generation
+            return self.refresh(wait=True)
+        
+        if self.is_stale() and not self._refresh_lock.locked():
+            threading.Thread(target=self.refresh, kwargs={"wait": False}, daemon=True).start()
         
         return self.cache
-
-# Initialize the manager
-hot_topics_manager = HotTopicsManager()
-
-# FastAPI endpoints
-app = FastAPI()
-
-@app.get("/api/feed")
-def get_feed():
-    """Returns hot topics as a list of articles for the frontend."""
-    print("--- 📢 /API/FEED ENDPOINT HIT ---")
-    topics_data = hot_topics_manager.get_cached_topics()
-    topics = topics_data.get('topics', [])
-    articles = []
-    for topic in topics:
-        # Map backend topic fields to frontend FeedArticle fields
-        article = {
-            "id": topic.get("id", str(uuid.uuid4())),
-            "title": topic.get("headline", "Untitled Topic"),
-            "slug": topic.get("headline", "untitled-topic").lower().replace(" ", "-").replace("/", "-"),
-            "excerpt": topic.get("description", "No description available."),
-            "category": topic.get("category", "General"),
-            "publishedAt": topic.get("generated_at", datetime.now().isoformat()),
-            "readTime": 2,  # Default/fake value
-            "sourceCount": 1,  # Default/fake value
-            "heroImageUrl": topic.get("image_url", "https://images.pexels.com/photos/12345/news-image.jpg"),
-            "authorName": "AI Agent",
-            "authorTitle": "Hot Topics Generator"
-        }
-        articles.append(article)
-    return articles
-
-@app.post("/api/hot-topic/{topic_id}/research")
-def trigger_research(topic_id: str):
-    """Triggers research generation for a specific hot topic."""
-    # Find the topic
-    topics = hot_topics_manager.get_cached_topics()
-    topic = None
     
-    if topics and 'topics' in topics:
-        for t in topics['topics']:
-            if t.get('id') == topic_id:
-                topic = t
+    def get_topic(self, topic_id: str) -> Optional[Dict[str, Any]]:
+        """The topic with this ID in the snapshot currently served, if any."""
+        self.get_cached_topics()
+        return self.topics_by_id.get(topic_id)
+    
+    def prefetch_research(self, top_k: int = HOT_TOPICS_PREFETCH_TOP_K):
+        """
+        Speculatively queues research for the top topics on the low-priority prefetch queue. Topics whose
+        report is already cached are skipped, so after an incremental refresh only new stories are researched.
+        """
+        queued = 0
+        for topic in self.cache.get('topics', [])[:top_k]:
+            if research_cache.lookup(topic['headline']):
+                continue
+            try:
+                enqueue_research(topic['headline'], queue="prefetch")
+            except SchedulerSaturated:
+                print("--- 🚦 PREFETCH QUEUE FULL, SKIPPING THE REMAINING TOPICS ---")
                 break
+            queued += 1
+        if queued:
+            print(f"--- 🔮 PREFETCHING RESEARCH FOR {queued} HOT TOPICS ---")
     
-    if not topic:
-        raise HTTPException(status_code=404, detail="Hot topic not found")
+    def get_feed_snapshot(self) -> PrecomputedBody:
+        """The serialized /api/feed response for the snapshot get_cached_topics() serves."""
+        self.get_cached_topics()
+        return self.feed_snapshot
     
-    # Trigger research using the topic headline
-    # This would integrate with your existing research workflow
-    research_query = topic['headline']
+    def start_background_refresh(self):
+        """Starts a daemon thread that regenerates topics every refresh interval (plus jitter)."""
+        if self._refresher and self._refresher.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="hot-topics-refresher", daemon=True)
+        self._refresher.start()
     
-    # For now, return the topic info - in production, trigger actual research
-    return {
-        "topic": topic,
-        "research_query": research_query,
-        "message": "Research triggered for this hot topic"
-    }
-
-@app.get("/")
-def read_root():
-    return {"message": "Hot Topics API is running"}
+    def stop_background_refresh(self):
+        self._stop_event.set()
+    
+    def _refresh_loop(self):
+        print("--- ⏰ HOT TOPICS BACKGROUND REFRESHER STARTED ---")
+        while not self._stop_event.is_set():
+            self.sync_shared(force=True)
+            if self.is_stale():
+                self.refresh(wait=False)
+            if self.is_stale():
+                # The refresh failed or produced nothing; try again soon instead of waiting a full interval
+                delay = min(HOT_TOPICS_RETRY_SECONDS, self.refresh_interval)
+            else:
+                # Sleep until this snapshot is due rather than a full interval from now
+                age = (datetime.now() - self.last_generated).total_seconds()
+                delay = self.refresh_interval - age + random.uniform(-self.refresh_jitter, self.refresh_jitter)
+            self._stop_event.wait(max(delay, 1.0))
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+# Initialize the manager
+hot_topics_manager = HotTopicsManager()
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from jobs import research_jobs
+from responses import precomputed_response
+from research_service import research_cache, submit_research
+from startup import lazy_import
+
+
+# Hot topics endpoints, mounted on the main app. The hot topics runtime (feed.py) is loaded on first use,
+# so including this router keeps the app's import light.
+router = APIRouter()
+
+
+def hot_topics_manager():
+    return lazy_import("feed").hot_topics_manager
+
+
+@router.get("/api/feed")
+def get_feed(request: Request):
+    """Returns hot topics as a list of articles for the frontend (precomputed bytes, 304 on a matching ETag)."""
+    try:
+        snapshot = hot_topics_manager().get_feed_snapshot()
+    except Exception as e:
+        print(f"--- ❌ HOT TOPICS UNAVAILABLE: {e} ---")
+        raise HTTPException(status_code=503, detail="Hot topics are not available yet", headers={"Retry-After": "30"})
+    return precomputed_response(request, snapshot)
+
+
+@router.post("/api/hot-topic/{topic_id}/research", status_code=202)
+def trigger_research(topic_id: str):
+    """Starts research on a hot topic (or joins the run already under way) and returns the job to follow."""
+    topic = hot_topics_manager().get_topic(topic_id)
+    if not topic:
+        raise HTTPException(status_code=404, detail="Hot topic not found")
+
+    # Research the topic's headline; a prefetched report is served straight from the query cache
+    research_query = topic['headline']
+    cached_slug = research_cache.lookup(research_query)
+    if cached_slug:
+        print(f"--- ♻️ SERVING CACHED REPORT FOR HOT TOPIC. SLUG: {cached_slug} ---")
+        return {"job_id": None, "query": research_query, "status": "completed", "slug": cached_slug, "cached": True,
+                "topic": topic}
+
+    job = submit_research(research_query)
+    return {
+        **research_jobs.status(job),
+        "topic": topic,
+        "status_url": f"/api/research/{job.id}",
+        "events_url": f"/api/research/{job.id}/events",
+    }
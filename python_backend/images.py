@@ -0,0 +1,125 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import TTLCache
+
+
+# --- Image Resolution Configuration ---
+PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
+PEXELS_SEARCH_URL = "https://api.pexels.com/v1/search"
+# Concurrent Pexels requests (also the size of the shared keep-alive connection pool)
+IMAGE_FETCH_CONCURRENCY = int(os.getenv("IMAGE_FETCH_CONCURRENCY", "8"))
+IMAGE_FETCH_TIMEOUT_SECONDS = float(os.getenv("IMAGE_FETCH_TIMEOUT_SECONDS", "5"))
+# Query -> image URL results; source names like "Reuters" repeat across nearly every report
+IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "4096"))
+IMAGE_CACHE_TTL_SECONDS = float(os.getenv("IMAGE_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+# Pexels allows 200 requests per hour by default; the bucket lets short bursts through
+PEXELS_RATE_LIMIT_PER_HOUR = float(os.getenv("PEXELS_RATE_LIMIT_PER_HOUR", "200"))
+PEXELS_RATE_LIMIT_BURST = int(os.getenv("PEXELS_RATE_LIMIT_BURST", "20"))
+# Longest a lookup waits for a rate-limit token before falling back to the placeholder image
+PEXELS_RATE_LIMIT_WAIT_SECONDS = float(os.getenv("PEXELS_RATE_LIMIT_WAIT_SECONDS", "2"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Takes one token, waiting up to `timeout` seconds for it. Returns False if none became available."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill_locked()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate if self.rate > 0 else timeout
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or wait > remaining:
+                return False
+            time.sleep(wait)
+
+    def drain(self):
+        """Empties the bucket, e.g. after the upstream answered 429."""
+        with self._lock:
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+
+
+class ImageResolver:
+    """
+    Resolves search queries to Pexels image URLs.
+    Lookups share one pooled HTTP session, run concurrently in batches, are cached with TTL/LRU eviction
+    and are throttled by a token bucket that matches the Pexels rate limit.
+    """
+
+    def __init__(self, api_key: Optional[str] = PEXELS_API_KEY, concurrency: int = IMAGE_FETCH_CONCURRENCY):
+        self.api_key = api_key
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        if api_key:
+            self.session.headers["Authorization"] = api_key
+        self.cache = TTLCache(IMAGE_CACHE_MAX_ENTRIES, ttl_seconds=IMAGE_CACHE_TTL_SECONDS)
+        self.rate_limiter = TokenBucket(PEXELS_RATE_LIMIT_PER_HOUR / 3600.0, PEXELS_RATE_LIMIT_BURST)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pexels")
+
+    def search(self, query: str, per_page: int = 5) -> List[str]:
+        """Returns up to `per_page` image URLs for a query, from cache when possible."""
+        key = (" ".join(query.lower().split()), per_page)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if not self.api_key:
+            print("--- PEXELS API KEY NOT FOUND ---")
+            return []
+        if not self.rate_limiter.acquire(timeout=PEXELS_RATE_LIMIT_WAIT_SECONDS):
+            print(f"--- 🚦 PEXELS RATE LIMIT REACHED, SKIPPING: {query} ---")
+            return []
+        try:
+            response = self.session.get(
+                PEXELS_SEARCH_URL,
+                params={"query": query, "page": 1, "per_page": per_page},
+                timeout=IMAGE_FETCH_TIMEOUT_SECONDS,
+            )
+            if response.status_code == 429:
+                self.rate_limiter.drain()
+            response.raise_for_status()
+            urls = [photo['src']['original'] for photo in response.json().get('photos', [])]
+        except Exception as e:
+            # Errors are not cached so the next report can try again
+            print(f"--- PEXELS API ERROR: {e} ---")
+            return []
+        self.cache.set(key, urls)
+        return urls
+
+    def resolve(self, query: str) -> Optional[str]:
+        """First image URL for a query, or None."""
+        urls = self.search(query, per_page=1)
+        return urls[0] if urls else None
+
+    def resolve_many(self, queries: List[str]) -> List[Optional[str]]:
+        """Resolves a batch of queries concurrently; repeated queries are looked up once. Keeps input order."""
+        unique = list(dict.fromkeys(queries))
+        results = dict(zip(unique, self._executor.map(self.resolve, unique)))
+        return [results[query] for query in queries]
+
+
+image_resolver = ImageResolver()
@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import html
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import timezone
+from typing import Any, Dict, List
+from xml.etree import ElementTree
+
+from categorizer import CATEGORY_VOCABULARIES
+from event_ranking import parse_published_at
+from scraping import scraping_engine
+from search import canonicalize_url, domain_of
+
+
+# --- Trending Ingestion Configuration ---
+# Comma-separated sources: "tavily" (one general query), "tavily:categories" (the general query plus one
+# per category, so 1 + 9 Tavily searches every refresh), "tavily:<query>", "rss:<feed url>" (RSS or Atom)
+# and "fixture:<path to a JSON list of events>".
+# Any source may end with ";timeout=<seconds>" to override the default timeout.
+TRENDING_SOURCES = os.getenv("TRENDING_SOURCES", "tavily")
+TRENDING_SOURCE_TIMEOUT_SECONDS = float(os.getenv("TRENDING_SOURCE_TIMEOUT_SECONDS", "8"))
+# Sources fetched at once; keep it at least the number of sources so every timeout starts together
+TRENDING_MAX_PARALLEL = int(os.getenv("TRENDING_MAX_PARALLEL", "16"))
+
+GENERAL_TRENDING_QUERY = "trending news today"
+
+_TAGS = re.compile(r"<[^>]+>")
+_ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def normalize_event(title: Any, url: Any, source: Any, published_at: Any, summary: Any, origin: str) -> Dict[str, Any]:
+    """
+    The event shape every source produces, with HTML stripped from the text fields and the date as a UTC
+    ISO 8601 string (None when the source gives no usable date, so ranking treats it as unknown, not as new).
+    """
+    def clean(value: Any) -> str:
+        return " ".join(html.unescape(_TAGS.sub(" ", str(value or ""))).split())
+
+    url = str(url or "").strip()
+    published = parse_published_at(published_at)
+    return {
+        "title": clean(title) or "Untitled",
+        "url": url,
+        "source": clean(source) or domain_of(url),
+        "published_at": published.astimezone(timezone.utc).isoformat() if published else None,
+        "summary": clean(summary),
+        "origin": origin,
+    }
+
+
+class TrendingSource(ABC):
+    """One place trending events come from. Subclasses implement fetch()."""
+
+    def __init__(self, name: str, timeout: float = TRENDING_SOURCE_TIMEOUT_SECONDS):
+        self.name = name
+        self.timeout = timeout
+
+    @abstractmethod
+    def fetch(self) -> List[Dict[str, Any]]:
+        ...
+
+
+class TavilySource(TrendingSource):
+    def __init__(self, search_tool: Any, query: str, timeout: float = TRENDING_SOURCE_TIMEOUT_SECONDS):
+        super().__init__(f"tavily:{query}", timeout)
+        self.search_tool = search_tool
+        self.query = query
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        results = self.search_tool.invoke(self.query)
+        # Tavily may return a list or dict with 'results' key
+        if isinstance(results, dict):
+            articles = results.get('results', [])
+        elif isinstance(results, list):
+            articles = results
+        else:
+            articles = []
+        return [
+            normalize_event(article.get("title"), article.get("url"), article.get("source"),
+                            article.get("published_at") or article.get("published_date"),
+                            article.get("content", article.get("description", "")), self.name)
+            for article in articles if isinstance(article, dict)
+        ]
+
+
+class FeedSource(TrendingSource):
+    """An RSS 2.0 or Atom feed, fetched over the shared scraping connection pool."""
+
+    def __init__(self, url: str, timeout: float = TRENDING_SOURCE_TIMEOUT_SECONDS):
+        super().__init__(f"rss:{url}", timeout)
+        self.url = url
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        response = scraping_engine.session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return self.parse(response.content)
+
+    def parse(self, body: bytes) -> List[Dict[str, Any]]:
+        root = ElementTree.fromstring(body)
+        events = []
+        channel = root.find("channel")
+        if channel is not None:
+            feed_title = channel.findtext("title")
+            for item in channel.iter("item"):
+                events.append(normalize_event(item.findtext("title"), item.findtext("link"), feed_title,
+                                              item.findtext("pubDate"), item.findtext("description"),
+                                              self.name))
+            return events
+        feed_title = root.findtext(f"{_ATOM}title")
+        for entry in root.iter(f"{_ATOM}entry"):
+            link = entry.find(f"{_ATOM}link[@rel='alternate']")
+            if link is None:
+                link = entry.find(f"{_ATOM}link")
+            events.append(normalize_event(
+                entry.findtext(f"{_ATOM}title"),
+                link.get("href") if link is not None else "",
+                feed_title,
+                entry.findtext(f"{_ATOM}published") or entry.findtext(f"{_ATOM}updated"),
+                entry.findtext(f"{_ATOM}summary") or entry.findtext(f"{_ATOM}content"),
+                self.name,
+            ))
+        return events
+
+
+class FixtureSource(TrendingSource):
+    """A local JSON file holding a list of events, for development and offline runs."""
+
+    def __init__(self, path: str, timeout: float = TRENDING_SOURCE_TIMEOUT_SECONDS):
+        super().__init__(f"fixture:{path}", timeout)
+        self.path = path
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        return [
+            normalize_event(item.get("title"), item.get("url"), item.get("source"), item.get("published_at"),
+                            item.get("summary", item.get("content", "")), self.name)
+            for item in items
+        ]
+
+
+def build_sources(spec: str, search_tool: Any) -> List[TrendingSource]:
+    """
+    Parses a TRENDING_SOURCES specification into sources. Unknown entries are skipped and malformed timeouts
+    fall back to the default, each with a warning.
+    """
+    sources: List[TrendingSource] = []
+    for entry in (part.strip() for part in spec.split(",")):
+        if not entry:
+            continue
+        entry, _, options = entry.partition(";timeout=")
+        timeout = TRENDING_SOURCE_TIMEOUT_SECONDS
+        if options:
+            try:
+                timeout = float(options)
+            except ValueError:
+                print(f"--- ⚠️ INVALID TIMEOUT FOR TRENDING SOURCE {entry}: {options!r}, USING {timeout}s ---")
+        kind, _, target = entry.partition(":")
+        if kind == "tavily" and target == "categories":
+            # Each category is a billed search, so the broader coverage is opt-in
+            sources.append(TavilySource(search_tool, GENERAL_TRENDING_QUERY, timeout))
+            sources.extend(TavilySource(search_tool, f"latest {category.lower()} news today", timeout)
+                           for category in CATEGORY_VOCABULARIES)
+        elif kind == "tavily" and target:
+            sources.append(TavilySource(search_tool, target, timeout))
+        elif kind == "tavily":
+            sources.append(TavilySource(search_tool, GENERAL_TRENDING_QUERY, timeout))
+        elif kind == "rss" and target:
+            sources.append(FeedSource(target, timeout))
+        elif kind == "fixture" and target:
+            sources.append(FixtureSource(target, timeout))
+        else:
+            print(f"--- ⚠️ UNKNOWN TRENDING SOURCE: {entry} ---")
+    return sources
+
+
+_executor = ThreadPoolExecutor(max_workers=TRENDING_MAX_PARALLEL, thread_name_prefix="ingest")
+
+
+def ingest(sources: List[TrendingSource]) -> List[Dict[str, Any]]:
+    """
+    Fetches every source concurrently and merges the results into one event list, deduplicated by canonical URL.
+    Each source has its own timeout; a slow or failing source is left out instead of holding up the rest.
+    """
+    started = time.monotonic()
+    futures = [(source, _executor.submit(source.fetch)) for source in sources]
+    merged: Dict[str, Dict[str, Any]] = {}
+    for source, future in futures:
+        remaining = max(0.0, started + source.timeout - time.monotonic())
+        try:
+            events = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            print(f"--- ⚠️ TRENDING SOURCE {source.name} TIMED OUT AFTER {source.timeout}s ---")
+            continue
+        except Exception as e:
+            print(f"--- ⚠️ TRENDING SOURCE {source.name} FAILED: {e} ---")
+            continue
+        for event in events:
+            key = canonicalize_url(event["url"]) if event["url"] else f"{source.name}:{event['title']}"
+            existing = merged.get(key)
+            if existing is None or len(event["summary"]) > len(existing["summary"]):
+                merged[key] = event
+    print(f"--- 📥 INGESTED {len(merged)} EVENTS FROM {len(sources)} SOURCES IN {time.monotonic() - started:.2f}s ---")
+    return list(merged.values())
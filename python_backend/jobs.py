@@ -0,0 +1,325 @@
+import os
+import time
+import asyncio
+import threading
+import uuid
+from collections import deque, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from metrics import metrics
+
+
+# --- Scheduler Configuration ---
+# Number of research graphs that may execute at the same time in this process
+RESEARCH_MAX_WORKERS = int(os.getenv("RESEARCH_MAX_WORKERS", "4"))
+# Number of research requests allowed to wait for a free worker before we answer 429
+RESEARCH_MAX_QUEUE = int(os.getenv("RESEARCH_MAX_QUEUE", "16"))
+# Number of finished research jobs whose status and events are kept for polling clients
+RESEARCH_JOB_HISTORY = int(os.getenv("RESEARCH_JOB_HISTORY", "200"))
+# Speculative research (reports prefetched for hot topics) runs on its own queue with its own worker slots,
+# so it never delays a reader's request
+RESEARCH_PREFETCH_MAX_IN_FLIGHT = int(os.getenv("RESEARCH_PREFETCH_MAX_IN_FLIGHT", "1"))
+RESEARCH_PREFETCH_MAX_QUEUE = int(os.getenv("RESEARCH_PREFETCH_MAX_QUEUE", "8"))
+
+
+JOB_QUEUE_TIME = metrics.histogram("research_job_queue_seconds", "Time a research job waited for a worker.", ("queue",))
+JOBS_REJECTED = metrics.counter("research_jobs_rejected_total", "Research jobs refused because their queue was full.", ("queue",))
+
+
+class SchedulerSaturated(Exception):
+    """Raised when a queue has no room left for another job."""
+
+    def __init__(self, queue: str, in_flight: int, pending: int):
+        self.queue = queue
+        self.in_flight = in_flight
+        self.pending = pending
+        super().__init__(f"Research queue '{queue}' is full ({in_flight} running, {pending} waiting)")
+
+
+class QueueLimits:
+    """Caps for a single named queue: how many jobs may run and how many may wait."""
+
+    def __init__(self, max_in_flight: int, max_pending: int):
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+
+
+class ScheduledJob:
+    """A unit of work handed to the scheduler. `future` resolves with the function's result."""
+
+    def __init__(self, queue: str, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        self.id = uuid.uuid4().hex
+        self.queue = queue
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.submitted_at = time.monotonic()
+        self.future: Future = Future()
+
+
+class ResearchJobScheduler:
+    """
+    Runs blocking research graphs on a bounded worker pool so they never block the event loop.
+    Every named queue has its own in-flight and pending caps; all queues share the same workers.
+    """
+
+    def __init__(self, max_workers: int, queues: Dict[str, QueueLimits]):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="research")
+        self._limits = queues
+        self._pending: Dict[str, Deque[ScheduledJob]] = {name: deque() for name in queues}
+        self._running: Dict[str, int] = {name: 0 for name in queues}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, queue: str = "interactive", **kwargs) -> ScheduledJob:
+        """Queues `fn(*args, **kwargs)`. Raises SchedulerSaturated when the queue is full."""
+        if queue not in self._limits:
+            raise ValueError(f"Unknown research queue: {queue}")
+
+        job = ScheduledJob(queue, fn, args, kwargs)
+        with self._lock:
+            limits = self._limits[queue]
+            running = self._running[queue]
+            pending = len(self._pending[queue])
+            if running >= limits.max_in_flight and pending >= limits.max_pending:
+                JOBS_REJECTED.inc(queue=queue)
+                raise SchedulerSaturated(queue, running, pending)
+            self._pending[queue].append(job)
+            self._dispatch_locked()
+        return job
+
+    def requeue(self, job: ScheduledJob, queue: str) -> bool:
+        """
+        Moves a job that is still waiting to the back of another queue. Returns False, leaving the job
+        where it was, once it has started or when the target queue is full.
+        """
+        if queue not in self._limits:
+            raise ValueError(f"Unknown research queue: {queue}")
+
+        with self._lock:
+            if job.queue == queue or job not in self._pending[job.queue]:
+                return False
+            limits = self._limits[queue]
+            if self._running[queue] >= limits.max_in_flight and len(self._pending[queue]) >= limits.max_pending:
+                return False
+            self._pending[job.queue].remove(job)
+            job.queue = queue
+            self._pending[queue].append(job)
+            self._dispatch_locked()
+        return True
+
+    def queue_position(self, job: ScheduledJob) -> Optional[int]:
+        """1-based position of a waiting job, 0 once it is running, None once it has finished."""
+        with self._lock:
+            try:
+                return self._pending[job.queue].index(job) + 1
+            except ValueError:
+                return None if job.future.done() else 0
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Current running/pending counts per queue."""
+        with self._lock:
+            return {
+                name: {
+                    "running": self._running[name],
+                    "pending": len(self._pending[name]),
+                    "max_in_flight": limits.max_in_flight,
+                    "max_pending": limits.max_pending,
+                }
+                for name, limits in self._limits.items()
+            }
+
+    def _dispatch_locked(self):
+        for name, limits in self._limits.items():
+            pending = self._pending[name]
+            while pending and self._running[name] < limits.max_in_flight:
+                job = pending.popleft()
+                self._running[name] += 1
+                self._executor.submit(self._run, job)
+
+    def _run(self, job: ScheduledJob):
+        if not job.future.set_running_or_notify_cancel():
+            self._finish(job)
+            return
+        JOB_QUEUE_TIME.observe(time.monotonic() - job.submitted_at, queue=job.queue)
+        try:
+            result = job.fn(*job.args, **job.kwargs)
+        except BaseException as e:
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        finally:
+            self._finish(job)
+
+    def _finish(self, job: ScheduledJob):
+        with self._lock:
+            self._running[job.queue] -= 1
+            self._dispatch_locked()
+
+
+research_scheduler = ResearchJobScheduler(
+    max_workers=RESEARCH_MAX_WORKERS + RESEARCH_PREFETCH_MAX_IN_FLIGHT,
+    queues={
+        "interactive": QueueLimits(max_in_flight=RESEARCH_MAX_WORKERS, max_pending=RESEARCH_MAX_QUEUE),
+        "prefetch": QueueLimits(max_in_flight=RESEARCH_PREFETCH_MAX_IN_FLIGHT, max_pending=RESEARCH_PREFETCH_MAX_QUEUE),
+    },
+)
+
+metrics.gauge(
+    "research_jobs", "Research jobs currently running or waiting, per queue.", ("queue", "state"),
+    lambda: {
+        (queue, state): stats[state]
+        for queue, stats in research_scheduler.stats().items()
+        for state in ("running", "pending")
+    },
+)
+
+
+class ResearchJob:
+    """
+    Tracks one asynchronous research run: its status, result and the ordered list of progress events.
+    Events are appended from the worker thread and read by pollers or SSE streams on the event loop.
+    """
+
+    def __init__(self, query: str):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.status = "queued"
+        self.slug: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.scheduled: Optional[ScheduledJob] = None
+        self.key: Optional[str] = None
+        self._lock = threading.Lock()
+        self._waiters: List[tuple] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def publish(self, event: str, **data):
+        """Appends a progress event and wakes up every stream waiting for one."""
+        self._publish(event, data)
+
+    def _publish(self, event: str, data: Dict[str, Any], **state):
+        with self._lock:
+            self.events.append({"event": event, "job_id": self.id, "timestamp": time.time(), **data})
+            # State changes are applied after their event is listed, so a finished job always has its terminal event
+            for name, value in state.items():
+                setattr(self, name, value)
+            waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
+
+    def mark_running(self):
+        self._publish("started", {}, status="running")
+
+    def complete(self, slug: str):
+        self._publish("completed", {"slug": slug}, slug=slug, finished_at=time.time(), status="completed")
+
+    def fail(self, error: str):
+        self._publish("failed", {"error": error}, error=error, finished_at=time.time(), status="failed")
+
+    async def next_events(self, cursor: int, timeout: float) -> List[Dict[str, Any]]:
+        """Returns events after `cursor`, waiting up to `timeout` seconds for new ones."""
+        with self._lock:
+            if cursor < len(self.events):
+                return self.events[cursor:]
+            waiter = asyncio.Event()
+            self._waiters.append((asyncio.get_running_loop(), waiter))
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        with self._lock:
+            return self.events[cursor:]
+
+
+class ResearchJobRegistry:
+    """
+    Creates research jobs on the scheduler and remembers a bounded number of them by ID.
+    Jobs submitted with the same key while one is still queued or running share that run (single-flight).
+    """
+
+    def __init__(self, scheduler: ResearchJobScheduler, max_jobs: int):
+        self.scheduler = scheduler
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ResearchJob]" = OrderedDict()
+        self._in_flight: Dict[str, ResearchJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, runner: Callable[..., str], query: str, queue: str = "interactive",
+               key: Optional[str] = None) -> ResearchJob:
+        """
+        Schedules `runner(query, on_event=...)` and returns the job immediately.
+        If `key` matches a job that has not finished yet, that job is returned instead of starting another run;
+        a reader joining a prefetch that is still waiting moves it to the interactive queue.
+        Raises SchedulerSaturated when the queue is full.
+        """
+        with self._lock:
+            if key is not None and key in self._in_flight:
+                job = self._in_flight[key]
+                print(f"--- 🔗 JOINING IN-FLIGHT RESEARCH JOB {job.id} FOR: {query} ---")
+                if queue == "interactive" and self.scheduler.requeue(job.scheduled, queue):
+                    print(f"--- ⏫ MOVED RESEARCH JOB {job.id} TO THE {queue.upper()} QUEUE ---")
+                return job
+            job = ResearchJob(query)
+            job.key = key
+            job.publish("queued", queue=queue)
+            job.scheduled = self.scheduler.submit(self._execute, job, runner, queue=queue)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._in_flight[key] = job
+            self._evict_locked()
+        return job
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job: ResearchJob) -> Dict[str, Any]:
+        """JSON-friendly snapshot of a job for polling clients."""
+        return {
+            "job_id": job.id,
+            "query": job.query,
+            "status": job.status,
+            "queue_position": None if job.finished else self.scheduler.queue_position(job.scheduled),
+            "slug": job.slug,
+            "error": job.error,
+            "events": len(job.events),
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
+
+    def _execute(self, job: ResearchJob, runner: Callable[..., str]) -> Optional[str]:
+        job.mark_running()
+        try:
+            # The job ID doubles as the trace ID so /api/traces/{job_id} shows this run's spans
+            slug = runner(job.query, on_event=job.publish, trace_id=job.id)
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            print(f"--- ❌ RESEARCH JOB {job.id} FAILED: {detail} ---")
+            self._release(job)
+            job.fail(str(detail))
+            return None
+        self._release(job)
+        job.complete(slug)
+        return slug
+
+    def _release(self, job: ResearchJob):
+        with self._lock:
+            if job.key is not None and self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+
+    def _evict_locked(self):
+        # Only finished jobs are forgotten; running or queued ones must stay reachable
+        overflow = len(self._jobs) - self.max_jobs
+        if overflow <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:overflow]:
+            del self._jobs[job_id]
+
+
+research_jobs = ResearchJobRegistry(research_scheduler, max_jobs=RESEARCH_JOB_HISTORY)
@@ -0,0 +1,130 @@
+import re
+import json
+from typing import Any, List, Optional, Tuple
+
+
+_FENCE = re.compile(r"```(?:json|JSON)?[ \t]*\n?")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONRepairError(ValueError):
+    """Raised when no JSON value can be recovered from a model response."""
+
+
+class JSONScanner:
+    """
+    Incremental scanner for the outermost JSON array/object in model output. Text can be fed in chunks
+    (e.g. as tokens stream in); leading prose is skipped and anything after the outermost value is ignored.
+    It tracks strings and escapes so brackets inside string values do not confuse it, and remembers the
+    last point where the value could be cut cleanly if the output turns out to be truncated.
+    """
+
+    def __init__(self):
+        self.chars: List[str] = []
+        self.stack: List[str] = []
+        self.started = False
+        self.complete = False
+        self.in_string = False
+        self._escaped = False
+        # (length of output, open containers) at the last comma, where a truncated value can be cut
+        self.last_cut: Optional[Tuple[int, str]] = None
+
+    def feed(self, chunk: str) -> bool:
+        """Consumes a chunk of text. Returns True once the outermost value has been closed."""
+        for ch in chunk:
+            if self.complete:
+                break
+            if not self.started:
+                if ch in _CLOSERS:
+                    self.started = True
+                    self.stack.append(ch)
+                    self.chars.append(ch)
+                continue
+            self.chars.append(ch)
+            if self.in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in _CLOSERS:
+                self.stack.append(ch)
+            elif ch in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if not self.stack:
+                    self.complete = True
+            elif ch == ",":
+                self.last_cut = (len(self.chars) - 1, "".join(self.stack))
+        return self.complete
+
+    def text(self) -> str:
+        return "".join(self.chars)
+
+    def repaired_candidates(self) -> List[str]:
+        """The scanned value, followed by progressively more conservative repairs if it was cut off."""
+        text = self.text()
+        if self.complete:
+            return [text]
+        candidates = []
+        # Truncated: drop the incomplete trailing element and close the containers that were open there
+        if self.last_cut is not None:
+            length, stack = self.last_cut
+            candidates.append(text[:length] + _close(stack))
+        # Otherwise keep what there is: close the open string and every open container
+        closed = text + ('"' if self.in_string else "")
+        closed = re.sub(r'[,:\s]*$', "", closed)
+        closed = re.sub(r',\s*"[^"]*"\s*$', "", closed)
+        candidates.append(closed + _close("".join(self.stack)))
+        return candidates
+
+
+def _close(stack: str) -> str:
+    return "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def strip_trailing_commas(text: str) -> str:
+    """Removes commas directly before a closing bracket, leaving string contents untouched."""
+    out = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(ch)
+    return "".join(out)
+
+
+def extract_json(text: str) -> Any:
+    """
+    Recovers the outermost JSON array/object from a model response: markdown fences and surrounding prose
+    are ignored, trailing commas are dropped and truncated output is closed off. Raises JSONRepairError.
+    """
+    if not isinstance(text, str):
+        raise JSONRepairError(f"Expected text, got {type(text).__name__}")
+    scanner = JSONScanner()
+    scanner.feed(_FENCE.sub("", text))
+    if not scanner.started:
+        raise JSONRepairError("No JSON array or object found in response")
+
+    error = None
+    for candidate in scanner.repaired_candidates():
+        try:
+            return json.loads(strip_trailing_commas(candidate))
+        except json.JSONDecodeError as e:
+            error = e
+    raise JSONRepairError(f"Could not repair JSON: {error}")
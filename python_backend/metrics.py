@@ -0,0 +1,367 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# --- Metrics Configuration ---
+# Number of recent traces kept for /api/traces/{trace_id}
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "200"))
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class _Metric:
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+        return "{" + body + "}"
+
+
+class Counter(_Metric):
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, "counter", labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Gauge whose values are read from a callback at scrape time."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...], collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, help_text, "gauge", labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in self.collect().items()]
+
+
+class Histogram(_Metric):
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        super().__init__(name, help_text, "histogram", labelnames)
+        self.buckets = buckets
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+            counts[1] += value
+            counts[2] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (bucket_counts, total, count) in self._values.items():
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': str(bound)})} {bucket_count}")
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {count}")
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: "OrderedDict[str, _Metric]" = OrderedDict()
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DURATION_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...], collect: Callable[[], Dict[Tuple[str, ...], float]]) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+NODE_DURATION = metrics.histogram("langgraph_node_duration_seconds", "Wall time spent inside a graph node.", ("graph", "node"))
+NODE_QUEUE_TIME = metrics.histogram("langgraph_node_queue_seconds", "Time between a node becoming runnable and starting.", ("graph", "node"))
+NODE_ERRORS = metrics.counter("langgraph_node_errors_total", "Graph node invocations that raised.", ("graph", "node"))
+NODE_RETRIES = metrics.counter("langgraph_node_retries_total", "Retried upstream calls made while a node ran.", ("graph", "node"))
+NODE_PAYLOAD_BYTES = metrics.histogram("langgraph_node_payload_bytes", "Size of the state update a node returned.", ("graph", "node"), SIZE_BUCKETS)
+LLM_PROMPT_TOKENS = metrics.counter("llm_prompt_tokens_total", "Prompt tokens sent to the model.", ("graph", "node", "model"))
+LLM_COMPLETION_TOKENS = metrics.counter("llm_completion_tokens_total", "Completion tokens returned by the model.", ("graph", "node", "model"))
+GRAPH_DURATION = metrics.histogram("langgraph_run_duration_seconds", "Wall time of a whole graph run.", ("graph",))
+GRAPH_RUNS = metrics.counter("langgraph_runs_total", "Graph runs by outcome.", ("graph", "outcome"))
+
+
+# --- Traces ---
+class Span:
+    """Timing and usage of one node invocation inside a trace."""
+
+    def __init__(self, graph: str, node: str, queue_seconds: float):
+        self.graph = graph
+        self.node = node
+        self.started_at = time.time()
+        self.ended_at: Optional[float] = None
+        self.queue_seconds = queue_seconds
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+        self.payload_bytes = 0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "graph": self.graph,
+            "node": self.node,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "duration_seconds": (self.ended_at or time.time()) - self.started_at,
+            "queue_seconds": self.queue_seconds,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "retries": self.retries,
+            "payload_bytes": self.payload_bytes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """All spans recorded for one graph run, identified by a trace ID."""
+
+    def __init__(self, graph: str, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.graph = graph
+        self.started_at = time.time()
+        self.ended_at: Optional[float] = None
+        self.spans: List[Span] = []
+        self.attributes: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def last_finished_at(self, before: float) -> float:
+        """End time of the latest span that finished before `before`, or the trace start."""
+        with self._lock:
+            ends = [span.ended_at for span in self.spans if span.ended_at is not None and span.ended_at <= before]
+        return max(ends, default=self.started_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {
+            "trace_id": self.trace_id,
+            "graph": self.graph,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "duration_seconds": (self.ended_at or time.time()) - self.started_at,
+            "prompt_tokens": sum(span["prompt_tokens"] for span in spans),
+            "completion_tokens": sum(span["completion_tokens"] for span in spans),
+            "attributes": self.attributes,
+            "spans": spans,
+        }
+
+
+def critical_path(trace: Trace, predecessors: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    The chain of spans that set the run's duration: from the span that finished last, repeatedly step back to
+    the predecessor that finished last before it started. `wait_seconds` is the gap after that predecessor.
+    """
+    with trace._lock:
+        spans = [span for span in trace.spans if span.ended_at is not None]
+    latest: Dict[str, Span] = {}
+    for span in spans:
+        if span.node not in latest or span.ended_at > latest[span.node].ended_at:
+            latest[span.node] = span
+    if not latest:
+        return []
+
+    current = max(latest.values(), key=lambda span: span.ended_at)
+    path = [(current, current.started_at - trace.started_at)]
+    visited = {current.node}
+    while True:
+        gating = [latest[node] for node in predecessors.get(current.node, [])
+                  if node in latest and node not in visited and latest[node].ended_at <= current.started_at]
+        if not gating:
+            break
+        previous = max(gating, key=lambda span: span.ended_at)
+        path[-1] = (current, current.started_at - previous.ended_at)
+        path.append((previous, previous.started_at - trace.started_at))
+        visited.add(previous.node)
+        current = previous
+
+    return [
+        {"node": span.node, "duration_seconds": round(span.ended_at - span.started_at, 4), "wait_seconds": round(wait, 4)}
+        for span, wait in reversed(path)
+    ]
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_traces: "OrderedDict[str, Trace]" = OrderedDict()
+_traces_lock = threading.Lock()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def get_trace(trace_id: str) -> Optional[Trace]:
+    with _traces_lock:
+        return _traces.get(trace_id)
+
+
+@contextmanager
+def start_trace(graph: str, trace_id: Optional[str] = None):
+    """Opens a trace for one graph run. Nodes invoked inside it (in any thread the graph spawns) record spans on it."""
+    trace = Trace(graph, trace_id)
+    with _traces_lock:
+        _traces[trace.trace_id] = trace
+        while len(_traces) > TRACE_HISTORY:
+            _traces.popitem(last=False)
+    token = _current_trace.set(trace)
+    outcome = "error"
+    try:
+        yield trace
+        outcome = "success"
+    finally:
+        _current_trace.reset(token)
+        trace.ended_at = time.time()
+        GRAPH_DURATION.observe(trace.ended_at - trace.started_at, graph=graph)
+        GRAPH_RUNS.inc(graph=graph, outcome=outcome)
+
+
+def _payload_size(update: Any) -> int:
+    if not update:
+        return 0
+    try:
+        return len(json.dumps({key: value for key, value in update.items() if key != "messages"}, default=str))
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
+
+def instrument_node(graph: str, node: str, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Wraps a graph node so every call records duration, queue time, payload size, errors and LLM usage."""
+
+    def instrumented(state):
+        trace = _current_trace.get()
+        started = time.time()
+        queue_seconds = started - trace.last_finished_at(started) if trace else 0.0
+        span = Span(graph, node, queue_seconds)
+        if trace:
+            trace.add_span(span)
+        token = _current_span.set(span)
+        try:
+            update = fn(state)
+        except Exception as e:
+            span.error = str(e)
+            NODE_ERRORS.inc(graph=graph, node=node)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.ended_at = time.time()
+            NODE_DURATION.observe(span.ended_at - span.started_at, graph=graph, node=node)
+            NODE_QUEUE_TIME.observe(queue_seconds, graph=graph, node=node)
+        span.payload_bytes = _payload_size(update)
+        NODE_PAYLOAD_BYTES.observe(span.payload_bytes, graph=graph, node=node)
+        return update
+
+    instrumented.__name__ = getattr(fn, "__name__", node)
+    return instrumented
+
+
+def record_retry(count: int = 1):
+    """Counts a retried upstream call against the node that is currently running, if any."""
+    span = _current_span.get()
+    if span is None:
+        return
+    span.retries += count
+    NODE_RETRIES.inc(count, graph=span.graph, node=span.node)
+
+
+def record_token_usage(response):
+    """Attributes the token usage in a LangChain LLMResult to the graph node that made the call."""
+    span = _current_span.get()
+    graph, node = (span.graph, span.node) if span else ("", "")
+    llm_output = response.llm_output or {}
+    model = llm_output.get("model_name", "")
+    usage = llm_output.get("token_usage") or {}
+    prompt_tokens = usage.get("prompt_tokens", 0)
+    completion_tokens = usage.get("completion_tokens", 0)
+    if not usage:
+        # Newer integrations report usage on the message instead of llm_output
+        for generations in response.generations:
+            for generation in generations:
+                usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage_metadata.get("input_tokens", 0)
+                completion_tokens += usage_metadata.get("output_tokens", 0)
+    if span:
+        span.prompt_tokens += prompt_tokens
+        span.completion_tokens += completion_tokens
+    LLM_PROMPT_TOKENS.inc(prompt_tokens, graph=graph, node=node, model=model)
+    LLM_COMPLETION_TOKENS.inc(completion_tokens, graph=graph, node=node, model=model)
+
+
+_token_usage_callback = None
+_token_usage_callback_lock = threading.Lock()
+
+
+def get_token_usage_callback():
+    """
+    The process-wide LangChain callback that feeds record_token_usage. LangChain is imported on first use,
+    so importing this module (and the app, which only needs the registry) stays light.
+    """
+    global _token_usage_callback
+    with _token_usage_callback_lock:
+        if _token_usage_callback is None:
+            from langchain_core.callbacks import BaseCallbackHandler
+
+            class TokenUsageCallback(BaseCallbackHandler):
+                def on_llm_end(self, response, **kwargs):
+                    record_token_usage(response)
+
+            _token_usage_callback = TokenUsageCallback()
+        return _token_usage_callback
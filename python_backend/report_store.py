@@ -0,0 +1,171 @@
+import os
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from cache import TTLCache
+from schemas import ResearchReport
+from responses import PrecomputedBody
+
+
+# --- Report Store Configuration ---
+# "sqlite" keeps reports on disk so every worker (and every restart) can serve any slug; "memory" is per-process
+REPORT_STORE_BACKEND = os.getenv("REPORT_STORE", "sqlite")
+REPORT_STORE_PATH = os.getenv("REPORT_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "reports.db"))
+# The SQLite store keeps at most this many reports, and none older than the retention period; the oldest
+# are deleted as new ones are written (0 turns either limit off)
+REPORT_STORE_MAX_REPORTS = int(os.getenv("REPORT_STORE_MAX_REPORTS", "10000"))
+REPORT_STORE_RETENTION_SECONDS = float(os.getenv("REPORT_STORE_RETENTION_SECONDS", str(30 * 24 * 60 * 60)))
+# In-memory hot tier: most recently read reports, bounded by count, total bytes and age
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "256"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "3600"))
+
+
+def serialize_report(report: ResearchReport) -> bytes:
+    """Serializes a report exactly as the API returns it (camelCase field names)."""
+    return report.model_dump_json(by_alias=True).encode("utf-8")
+
+
+class ReportStore(ABC):
+    """
+    Interface for report storage. Reports are kept keyed by slug as the serialized JSON bytes the API
+    returns, together with their gzip copy and ETag, so reads never go back through the models.
+    """
+
+    @abstractmethod
+    def put_body(self, slug: str, body: PrecomputedBody):
+        ...
+
+    @abstractmethod
+    def get_body(self, slug: str) -> Optional[PrecomputedBody]:
+        ...
+
+    def put_raw(self, slug: str, body: bytes):
+        self.put_body(slug, PrecomputedBody(body))
+
+    def get_raw(self, slug: str) -> Optional[bytes]:
+        precomputed = self.get_body(slug)
+        return precomputed.body if precomputed is not None else None
+
+    def put(self, slug: str, report: ResearchReport):
+        self.put_raw(slug, serialize_report(report))
+
+    def get(self, slug: str) -> Optional[ResearchReport]:
+        body = self.get_raw(slug)
+        if body is None:
+            return None
+        return ResearchReport.model_validate_json(body)
+
+    def __contains__(self, slug: str) -> bool:
+        return self.get_raw(slug) is not None
+
+
+class MemoryReportStore(ReportStore):
+    """Bounded in-process store: LRU with entry, byte and TTL limits."""
+
+    def __init__(self, max_entries: int = REPORT_CACHE_MAX_ENTRIES, max_bytes: int = REPORT_CACHE_MAX_BYTES,
+                 ttl_seconds: Optional[float] = REPORT_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(max_entries, ttl_seconds=ttl_seconds, max_size=max_bytes, sizeof=len)
+
+    def put_body(self, slug: str, body: PrecomputedBody):
+        self._cache.set(slug, body)
+
+    def get_body(self, slug: str) -> Optional[PrecomputedBody]:
+        return self._cache.get(slug)
+
+
+class SQLiteReportStore(ReportStore):
+    """
+    On-disk store shared by every worker process on the host.
+    The slug is the table's primary key, so a lookup is a single index probe.
+    """
+
+    def __init__(self, path: str = REPORT_STORE_PATH, max_reports: int = REPORT_STORE_MAX_REPORTS,
+                 retention_seconds: float = REPORT_STORE_RETENTION_SECONDS):
+        self.path = path
+        self.max_reports = max_reports
+        self.retention_seconds = retention_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reports ("
+                "slug TEXT PRIMARY KEY, body BLOB NOT NULL, created_at REAL NOT NULL, gzip_body BLOB)"
+            )
+            # Databases created before reports were stored precompressed lack the column
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(reports)")}
+            if "gzip_body" not in columns:
+                conn.execute("ALTER TABLE reports ADD COLUMN gzip_body BLOB")
+            conn.execute("CREATE INDEX IF NOT EXISTS reports_created_at ON reports (created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads, so each worker thread opens its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put_body(self, slug: str, body: PrecomputedBody):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (slug, body, created_at, gzip_body) VALUES (?, ?, ?, ?)",
+                (slug, body.body, time.time(), body.gzip_body),
+            )
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Deletes reports past the retention period, then the oldest ones beyond the row cap."""
+        if self.retention_seconds > 0:
+            conn.execute("DELETE FROM reports WHERE created_at < ?", (time.time() - self.retention_seconds,))
+        if self.max_reports > 0:
+            conn.execute(
+                "DELETE FROM reports WHERE created_at < "
+                "(SELECT created_at FROM reports ORDER BY created_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_reports - 1,),
+            )
+
+    def get_body(self, slug: str) -> Optional[PrecomputedBody]:
+        row = self._connection().execute("SELECT body, gzip_body FROM reports WHERE slug = ?", (slug,)).fetchone()
+        if not row:
+            return None
+        # Rows written before precompression get their gzip copy built here, once per memory-tier load
+        return PrecomputedBody(bytes(row[0]), gzip_body=bytes(row[1]) if row[1] is not None else None)
+
+
+class TieredReportStore(ReportStore):
+    """Reads through a bounded in-memory tier to a durable backing store; writes go to both."""
+
+    def __init__(self, backing: ReportStore, memory: Optional[MemoryReportStore] = None):
+        self.backing = backing
+        self.memory = memory or MemoryReportStore()
+
+    def put_body(self, slug: str, body: PrecomputedBody):
+        self.backing.put_body(slug, body)
+        self.memory.put_body(slug, body)
+
+    def get_body(self, slug: str) -> Optional[PrecomputedBody]:
+        body = self.memory.get_body(slug)
+        if body is None:
+            body = self.backing.get_body(slug)
+            if body is not None:
+                self.memory.put_body(slug, body)
+        return body
+
+
+def create_report_store() -> ReportStore:
+    """Builds the report store selected by the REPORT_STORE environment variable."""
+    if REPORT_STORE_BACKEND == "memory":
+        print("--- 🗄️ USING IN-MEMORY REPORT STORE ---")
+        return MemoryReportStore()
+    if REPORT_STORE_BACKEND == "sqlite":
+        print(f"--- 🗄️ USING SQLITE REPORT STORE AT {REPORT_STORE_PATH} ---")
+        return TieredReportStore(SQLiteReportStore(REPORT_STORE_PATH))
+    raise ValueError(f"Unknown REPORT_STORE backend: {REPORT_STORE_BACKEND}")
@@ -0,0 +1,103 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+import unicodedata
+from typing import Optional
+
+from cache import TTLCache
+from report_store import ReportStore, REPORT_STORE_BACKEND, REPORT_STORE_PATH
+
+
+# --- Research Result Cache Configuration ---
+# How long a finished report answers identical queries; 0 disables the cache
+RESEARCH_CACHE_TTL_SECONDS = float(os.getenv("RESEARCH_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+# Apply light suffix stemming so "rate hikes" and "rate hike" share a report
+RESEARCH_CACHE_STEM = os.getenv("RESEARCH_CACHE_STEM", "true").lower() in ("1", "true", "yes")
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_SUFFIXES = ("ing", "ies", "es", "ed", "s")
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        # Keep short words intact so "bus" or "news" do not collapse into something else
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def normalize_query(query: str, stem: bool = RESEARCH_CACHE_STEM) -> str:
+    """Canonical cache key for a query: case-folded, punctuation stripped, whitespace collapsed, optionally stemmed."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = _NON_WORD_RE.sub(" ", text).replace("_", " ")
+    words = text.split()
+    if stem:
+        words = [_stem(word) for word in words]
+    return " ".join(words)
+
+
+class ResearchResultCache:
+    """
+    Maps normalized queries to the slug of a recently generated report.
+    Entries live next to the reports in SQLite so every worker sees them; the memory backend keeps them in-process.
+    """
+
+    def __init__(self, report_store: ReportStore, ttl_seconds: float = RESEARCH_CACHE_TTL_SECONDS,
+                 path: Optional[str] = None):
+        self.report_store = report_store
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._memory = TTLCache(max_entries=1024, ttl_seconds=ttl_seconds or None) if not path else None
+        self._local = threading.local()
+        if path:
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS query_results ("
+                    "query_key TEXT PRIMARY KEY, slug TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, query: str) -> Optional[str]:
+        """Returns the slug of a fresh report for this query, or None."""
+        if self.ttl_seconds <= 0:
+            return None
+        key = normalize_query(query)
+        if self._memory is not None:
+            slug = self._memory.get(key)
+        else:
+            row = self._connection().execute(
+                "SELECT slug FROM query_results WHERE query_key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds),
+            ).fetchone()
+            slug = row[0] if row else None
+        # The report itself may have been evicted from a memory-only store
+        if slug and slug in self.report_store:
+            return slug
+        return None
+
+    def remember(self, query: str, slug: str):
+        if self.ttl_seconds <= 0:
+            return
+        key = normalize_query(query)
+        if self._memory is not None:
+            self._memory.set(key, slug)
+            return
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_results (query_key, slug, created_at) VALUES (?, ?, ?)",
+                (key, slug, time.time()),
+            )
+
+
+def create_research_cache(report_store: ReportStore) -> ResearchResultCache:
+    """Builds the query cache alongside the configured report store."""
+    return ResearchResultCache(report_store, path=REPORT_STORE_PATH if REPORT_STORE_BACKEND == "sqlite" else None)
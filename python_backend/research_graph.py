@@ -0,0 +1,803 @@
+import os
+import re
+import json
+import uuid
+import threading
+from typing import List, Dict, Any, Optional, TypedDict, Annotated, Callable
+from fastapi import HTTPException
+from langchain_tavily import TavilySearch
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage, AIMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langgraph.graph import StateGraph, END, START
+from langgraph.prebuilt import ToolNode
+from dotenv import load_dotenv
+from langchain_core.tools import tool
+
+# Load .env before the local modules below read their configuration from the environment
+load_dotenv()
+
+from schemas import ResearchReport
+from context_builder import build_section_contexts
+from search import build_search_queries, run_searches, merge_results
+from scraping import scraping_engine, ScrapeError, SCRAPE_ENRICH_TOP_K, SCRAPE_ENRICH_TIMEOUT_SECONDS
+from images import image_resolver
+from agents import agent_registry, get_chat_model
+from metrics import instrument_node, record_retry
+from section_dag import add_section_edges, graph_predecessors
+from json_repair import extract_json, JSONRepairError
+from dedup import QuoteIndex, normalize_text
+from section_schemas import (validate_section, SectionValidationError, SECTION_OUTPUT_MODELS, section_from_output,
+                             construct_report)
+
+# The research pipeline: tools, agents, graph nodes and the graph itself. main.py imports this module on the
+# first research request (or from the warm-up hook), so the API process starts without langchain or langgraph.
+
+# --- Pexels Tool ---
+@tool
+def pexels_tool(query: str) -> List[Dict[str, Any]]:
+    """Searches for images on Pexels and returns a list of image URLs."""
+    return [{"url": url} for url in image_resolver.search(query, per_page=5)]
+
+# --- Research Prompt Template ---
+# This is the main research prompt that enforces real-time, non-partisan research
+RESEARCH_PROMPT_TEMPLATE = """You are a real-time, non-partisan research assistant with live web browsing capability. You NEVER fabricate data, quotes, articles, or URLs. Today you are researching "{query}" You only can output two types of responses:
+1. Content based on real articles, real public sources accessed live through your browsing ability with cited urls.
+2. Should there be issues with type 1, you will say "Error accessing web articles" or "No web article found"
+
+Quote guide: Any content you write within "" must never be paraphrased or rewritten, while content you write outside of "" can be paraphrased. They must be shown exactly as originally published. The only permitted edits to a quote are:
+    a. Ellipses: to remove extraneous content and make quote more concise
+    b. Square brackets: to clarify a word or replace a pronoun with noun for better readability
+
+You strictly follow this format, and provide no extra info outside of it:
+
+Executive Summary:
+Short, simple, easy to read, bullet point summary of event in plain English. Don't use complete sentences.
+
+Raw facts:
+1. Determine the raw facts on the topic primary sources ONLY
+Ex: Direct quote of what exactly was said, literal concrete propositions of a bill or policy from the document in question, statements from those involved, etc.
+Direct data or statements from government documents, public officials, or original press releases, NOT wikipedia. You may go to intermediary sites in your research, but get your data from their sources. No middle man organizations should be cited.
+If your researching a proposed law or bill, include raw facts directly from the document in question. Cite the name of the exact document or speaker they came from, + source
+Places you can find US law text & congress hearings:
+https://www.congress.gov/
+https://www.govinfo.gov/
+Official statements from White House:
+https://www.whitehouse.gov/news/
+2. Return all the raw facts you find in a bullet point list. Organize the list by source.
+
+Timeline:
+Bullet point timeline of events if relevant
+
+Different perspectives – summarize how the story is being covered by outlets with different perspectives on the story. Include REAL quotes and the outlet names. How are people and outlets interpreting the raw info from section 2?
+a. Research articles with opposing or different takes to this article
+-Consider what different views on this may be, and use search terms that would bring them up
+b. Organize them into distinct, differing, and opposing groups based on their perspective. Begin each viewpoint group with one clear headline labeling, write it as if it were a snappy headline the outlets in the group could've posted. Avoid using the word viewpoint in titles.
+c. Formatting:
+Viewpoint Title 1 (No "")
+- 1 bullet point summary of view
+- Publisher Name
+- Short Quote
+
+Conflicting Info:
+a. Determine if there are conflicts between any of the viewpoints you found
+b. If none return "No conflicts detected"
+c. IF you find conflicts:
+i. Clearly identify what the conflict or misconception is.
+ii. After each conflict list the conflicting sources as follows: [Source(s)] vs [Opposing Sources(s)]
+- Link
+- [Repeat if multiple articles under this viewpoint]
+- [Don't waste words on section titles like "Publisher Name:" or "Quote"]"""
+
+# --- Examples for Structured Output ---
+# These examples show the AI exactly what format to output for each section
+example_for_article = {
+    "title": "Research Report on [QUERY]",
+    "excerpt": "Comprehensive analysis based on real-time web research and primary sources.",
+    "content": "This report provides a detailed analysis based on live web research and primary source verification.",
+    "hero_image_url": "https://images.pexels.com/photos/12345/research-image.jpg"
+}
+
+example_for_executive_summary = {
+    "points": [
+        "Key finding 1 based on primary sources",
+        "Key finding 2 with direct citation",
+        "Key finding 3 from official documents"
+    ]
+}
+
+example_for_timeline_items = [
+    {
+        "date": "2024-01-01T00:00:00Z",
+        "title": "Event Title",
+        "description": "Description with direct quote from source",
+        "type": "Event Type",
+        "source_label": "Official Source Name",
+        "source_url": "https://official-source.gov/document"
+    }
+]
+
+example_for_cited_sources = [
+    {
+        "name": "Official Government Agency",
+        "type": "Primary Source",
+        "description": "Direct source of information",
+        "url": "https://official-source.gov"
+    }
+]
+
+example_for_raw_facts = [
+    {
+        "category": "Primary Source: [Source Name]",
+        "facts": [
+            "Direct quote from source",
+            "Literal statement from official document"
+        ]
+    }
+]
+
+example_for_perspectives = [
+    {
+        "viewpoint": "Perspective Headline",
+        "description": "Summary of this perspective",
+        "source": "Publisher Name",
+        "quote": "Exact quote from article",
+        "color": "blue",
+        "url": "https://publisher.com/article",
+        "reasoning": "Why this perspective matters",
+        "evidence": "Supporting evidence",
+        "conflict_source": "Opposing Source",
+        "conflict_quote": "Exact conflicting quote",
+        "conflict_url": "https://opposing-source.com/article"
+    }
+]
+example_for_conflicting_info = [
+    {
+        "conflict_id": "conflict_001",
+        "conflict_type": "factual_dispute",
+        "conflict_description": "Description of the specific conflict or contradiction",
+        "source_a": {
+            "name": "First Source Name",
+            "quote": "Exact quote from first source",
+            "url": "https://first-source.com/article",
+            "claim": "What this source claims"
+        },
+        "source_b": {
+            "name": "Opposing Source Name", 
+            "quote": "Exact conflicting quote from opposing source",
+            "url": "https://opposing-source.com/article",
+            "claim": "What the opposing source claims"
+        },
+        "resolution_status": "unresolved",
+        "severity": "high"
+    }
+]
+
+examples_map = {
+    "article": example_for_article,
+    "executive_summary": example_for_executive_summary,
+    "timeline_items": example_for_timeline_items,
+    "cited_sources": example_for_cited_sources,
+    "raw_facts": example_for_raw_facts,
+    "perspectives": example_for_perspectives,
+    "conflicting_info": example_for_conflicting_info
+}
+
+
+
+
+# Define a reducer function for merging dictionaries
+def merge_reports(dict1: dict, dict2: dict) -> dict:
+    return {**dict1, **dict2}
+
+# 1. Tool Setup
+tavily_tool = TavilySearch(max_results=15)
+
+@tool
+def scrape_website(url: str) -> str:
+    """Scrapes the content of a website."""
+    try:
+        return scraping_engine.fetch_text(url)
+    except ScrapeError as e:
+        return f"Error scraping website: {e}"
+
+tools = [tavily_tool, scrape_website]
+
+# 2. Agent State
+class AgentState(TypedDict):
+    messages: Annotated[list, lambda x, y: x + y]
+    query: str
+    scraped_data: list
+    research_report: Annotated[Optional[dict], merge_reports]
+    image_urls: Optional[dict]
+    section_contexts: Optional[dict]
+    context_stats: Optional[dict]
+    
+# 3. Agent and Graph Definition
+# Shared across every request and agent; see agents.py for the connection pool
+llm = get_chat_model("gpt-4o", temperature=0)
+
+def create_agent(llm, tools, system_prompt):
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system_prompt),
+            MessagesPlaceholder(variable_name="messages"),
+        ]
+    )
+    return prompt | llm.bind_tools(tools)
+
+def agent_node(state, agent, name):
+    result = agent.invoke(state)
+    return {"messages": [result]}
+
+# --- Research Agent ---
+# The research prompt is compiled once; the query is filled in through its {query} template variable
+agent_registry.register("researcher", lambda: create_agent(llm, [tavily_tool], RESEARCH_PROMPT_TEMPLATE))
+
+def research_node(state: AgentState):
+    print("--- 🔬 RESEARCHING ---")
+    research_agent = agent_registry.get("researcher")
+    result = research_agent.invoke({"messages": [HumanMessage(content=state['query'])], "query": state['query']})
+    print("--- ✅ RESEARCH COMPLETE ---")
+    return {"messages": [result]}
+
+# --- Scraper Agent ---
+def scraper_node(state: AgentState):
+    print("--- 🔍 SCRAPING WEB FOR PRIMARY SOURCES ---")
+    # Every search the researcher asked for is executed, not just the first one
+    requested = []
+    last_message = state['messages'][-1] if state['messages'] else None
+    for call in getattr(last_message, 'tool_calls', None) or []:
+        if call['name'] == 'tavily_search' and call['args'].get('query'):
+            requested.append(call['args']['query'])
+    if not requested:
+        print("--- NO TAVILY SEARCH TOOL CALL FOUND, SEARCHING FOR THE QUERY ITSELF ---")
+    
+    queries = build_search_queries(requested, state['query'])
+    print(f"--- 🔀 FANNING OUT {len(queries)} SEARCHES ---")
+    result_lists = run_searches(tavily_tool, queries)
+    merged = merge_results(result_lists)
+    
+    scraped_content = [{"url": res['url'], "content": res['content']} for res in merged]
+    total = sum(len(results) for results in result_lists)
+    print(f"--- SCRAPING {len(scraped_content)} PRIMARY SOURCE URLS ({total} RESULTS BEFORE MERGING) ---")
+    # Tavily only returns snippets; the best-ranked pages are fetched in full, and anything slow keeps its snippet
+    top_urls = [item['url'] for item in scraped_content[:SCRAPE_ENRICH_TOP_K]]
+    if top_urls:
+        full_texts = scraping_engine.fetch_many(top_urls, timeout=SCRAPE_ENRICH_TIMEOUT_SECONDS)
+        for item in scraped_content:
+            text = full_texts.get(item['url'])
+            if text and len(text) > len(item['content'] or ""):
+                item['content'] = text
+        print(f"--- 📄 ENRICHED {len(full_texts)}/{len(top_urls)} TOP RESULTS WITH FULL PAGE TEXT ---")
+        
+    print("--- ✅ SCRAPING COMPLETE ---")
+    return {"scraped_data": scraped_content, "messages": []}
+
+# --- Context Builder ---
+def context_builder_node(state: AgentState):
+    print("--- 🧩 PREPARING WRITER CONTEXT ---")
+    section_contexts, stats = build_section_contexts(state['scraped_data'], state['query'], list(writer_agents.keys()))
+    print(f"--- 📉 CONTEXT: {stats['duplicate_passages_removed']} DUPLICATE PASSAGES REMOVED, "
+          f"{stats['prompt_tokens']} PROMPT TOKENS INSTEAD OF {stats['baseline_prompt_tokens']} "
+          f"({stats['tokens_saved']} SAVED) ---")
+    return {"section_contexts": section_contexts, "context_stats": stats}
+
+# --- Image Fetcher Agent ---
+IMAGE_FETCHER_PROMPT = """You are an expert image researcher. Your goal is to use the Pexels tool to find relevant images.
+For the main article, use the original user query to find a hero image.
+For the cited sources, use the title of each source to find a relevant image.
+You must return a dictionary where the keys are 'hero_image' and 'source_images' (a list of URLs)."""
+image_fetcher_agent = create_agent(llm, [pexels_tool], IMAGE_FETCHER_PROMPT)
+
+def image_fetcher_node(state: AgentState):
+    print("--- 🖼️ FETCHING IMAGES ---")
+    
+    # Resolve the hero image and every cited source's image in one concurrent, cached batch
+    research_report = state.get('research_report', {})
+    source_names = [source['name'] for source in research_report.get('cited_sources', [])]
+    hero_image_url, *source_image_urls = image_resolver.resolve_many([state['query']] + source_names)
+    
+    hero_image_url = hero_image_url or "https://images.pexels.com/photos/12345/flood-image.jpg"
+    source_images = [url or "https://p-cdn.com/generic-source-logo.png" for url in source_image_urls]
+
+    print("--- ✅ IMAGES FETCHED ---")
+    return {"image_urls": {"hero_image": hero_image_url, "source_images": source_images}}
+
+
+# --- Writer Agents ---
+# Extra attempts a writer gets when its output is not valid JSON for its section
+WRITER_MAX_RETRIES = int(os.getenv("WRITER_MAX_RETRIES", "1"))
+# How writers return their section: "json_schema" (native structured output), "function_calling", or "json"
+# (free-form JSON guided by an example, repaired and validated after the fact)
+WRITER_OUTPUT_MODE = os.getenv("WRITER_OUTPUT_MODE", "json_schema")
+
+def writer_output_instructions(section_name: str) -> str:
+    if WRITER_OUTPUT_MODE != "json":
+        # The schema travels with the request, so no example is needed in the prompt
+        return f"Return the '{section_name}' section in the structured output format you have been given. Do not add any commentary."
+    # The example string is embedded in a prompt template, so its curly braces
+    # need to be escaped to avoid being interpreted as template variables.
+    example_str = json.dumps(examples_map[section_name], indent=2).replace("{", "{{").replace("}", "}}")
+    return f"""You MUST generate a valid JSON output that strictly follows the structure and field names of the example below.
+Do not add any commentary, explanations, or any text outside of the JSON output.
+
+### EXAMPLE FORMAT ###
+```json
+{example_str}
+```
+"""
+
+def create_writer(llm, section_name: str, system_prompt: str):
+    if WRITER_OUTPUT_MODE == "json":
+        return create_agent(llm, [], system_prompt)
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system_prompt),
+            MessagesPlaceholder(variable_name="messages"),
+        ]
+    )
+    # include_raw keeps the model's message so an unparseable answer can still be repaired and validated
+    return prompt | llm.with_structured_output(SECTION_OUTPUT_MODELS[section_name], method=WRITER_OUTPUT_MODE, include_raw=True)
+
+def create_writer_agent(section_name: str):
+    if section_name not in examples_map:
+        raise ValueError(f"No example found for section: {section_name}")
+    output_instructions = writer_output_instructions(section_name)
+
+    prompt = f"""You are an expert writing agent focused on real-time, non-partisan research. Your sole purpose is to generate a specific section of a research report based on provided web content.
+
+IMPORTANT: You NEVER fabricate data, quotes, articles, or URLs. You only work with real content from the provided sources.
+
+Quote guide: Any content you write within "" must never be paraphrased or rewritten, while content you write outside of "" can be paraphrased. They must be shown exactly as originally published.
+
+{output_instructions}
+
+Now, using the provided web content, generate the '{section_name}' section of the report. Adhere to the required format precisely and ensure all quotes are exact from the sources.
+"""
+    return create_writer(llm, section_name, prompt)
+
+# Create specialized conflicting info agent
+def create_conflicting_info_agent():
+    output_instructions = writer_output_instructions("conflicting_info")
+    
+    prompt = f"""You are a specialized conflict detection agent focused on identifying and analyzing conflicts between different sources in research data.
+
+Your primary goal is to find factual disputes, contradictions, opposing claims, and conflicting interpretations in the provided web content.
+
+IMPORTANT: You NEVER fabricate conflicts or sources. You only identify real conflicts from the provided content.
+
+CONTENT REQUIREMENTS:
+- Provide AT LEAST 2 different conflicts on the subject when conflicts exist
+- Each conflict should represent a distinct factual dispute or contradiction
+- Focus on finding significant conflicts that highlight different viewpoints or interpretations
+- Ensure each conflict has a clear, distinct description of what is being disputed
+- Avoid redundant or similar conflicts
+
+CRITICAL QUOTE AND SOURCE DEDUPLICATION RULE: 
+- You MUST ensure that quotes used in the conflicting_info section are DIFFERENT from quotes used in other sections (raw_facts, perspectives, etc.)
+- You MUST also ensure that NO QUOTE is repeated within the conflicting_info section itself
+- You MUST ensure that NO SOURCE is reused within the conflicting_info section itself
+- Each conflict must use completely unique quotes AND unique sources that have not been used in any other conflict
+- If a quote or source has already been used anywhere else, find alternative quotes from different sources
+- Focus on finding unique, distinct quotes and sources that highlight the specific conflicts
+- Avoid using the same quote OR the same source in multiple conflict sections
+- Each source can only appear once in the entire conflicting_info section
+
+Conflict Types to Look For:
+1. Factual Disputes: Different numbers, dates, statistics, or verifiable facts
+2. Interpretive Differences: Different conclusions drawn from the same data
+3. Methodological Conflicts: Different research approaches or methodologies
+4. Bias Patterns: Systematic differences in reporting or presentation
+5. Source Credibility: Conflicts between authoritative vs. non-authoritative sources
+
+{output_instructions}
+
+Now, analyze the provided web content to identify at least 2 different conflicts when they exist. For each conflict found:
+- Clearly describe what the conflict is about
+- Provide exact quotes from both sides (ensuring they are different from other sections AND from other conflicts in this section)
+- Include source URLs for verification
+- Categorize the conflict type
+- Assess the severity of the conflict
+- Ensure quote uniqueness within the conflicting_info section
+- NEVER use the same quote in multiple conflicts within this section
+- Each quote must be completely unique across all conflicts
+
+If no conflicts are found, return an empty array [].
+"""
+    return create_writer(llm, "conflicting_info", prompt)
+
+# Create specialized executive summary agent with limited points
+def create_executive_summary_agent():
+    output_instructions = writer_output_instructions("executive_summary")
+    
+    prompt = f"""You are a specialized executive summary agent focused on creating concise, bullet-point summaries of research findings.
+
+Your goal is to provide a brief, easy-to-read summary of the most important findings from the research.
+
+IMPORTANT: You NEVER fabricate data, quotes, articles, or URLs. You only work with real content from the provided sources.
+
+CONTENT LIMITATIONS:
+- Provide ONLY 4-6 bullet points maximum
+- Each bullet point should be concise and focused on the most critical information
+- Avoid redundant or overlapping information
+- Focus on the most newsworthy or significant findings
+
+{output_instructions}
+
+Now, analyze the provided web content to create a concise executive summary with 4-6 key points.
+"""
+    return create_writer(llm, "executive_summary", prompt)
+
+# Create specialized raw facts agent with limited facts
+def create_raw_facts_agent():
+    output_instructions = writer_output_instructions("raw_facts")
+    
+    prompt = f"""You are a specialized raw facts agent focused on extracting direct, verifiable facts from primary sources.
+
+Your goal is to identify the most important factual statements from the provided sources.
+
+IMPORTANT: You NEVER fabricate data, quotes, articles, or URLs. You only work with real content from the provided sources.
+
+CONTENT LIMITATIONS:
+- Provide ONLY 6 facts maximum across all sources
+- Focus on the most significant, verifiable facts
+- Avoid redundant or similar facts from the same source
+- Prioritize facts that are directly quoted or clearly stated
+- Organize by source, but limit to 6 total facts
+
+{output_instructions}
+
+Now, analyze the provided web content to extract the 6 most important raw facts from primary sources.
+"""
+    return create_writer(llm, "raw_facts", prompt)
+
+# Create specialized perspectives agent with minimum 2 perspectives
+def create_perspectives_agent():
+    output_instructions = writer_output_instructions("perspectives")
+    
+    prompt = f"""You are a specialized perspectives agent focused on identifying different viewpoints and interpretations of research findings.
+
+Your goal is to find contrasting perspectives on the topic from different sources and outlets.
+
+IMPORTANT: You NEVER fabricate data, quotes, articles, or URLs. You only work with real content from the provided sources.
+
+CONTENT REQUIREMENTS:
+- Provide AT LEAST 2 different perspectives on the subject
+- Each perspective should represent a distinct viewpoint or interpretation
+- Focus on finding opposing or contrasting viewpoints when possible
+- Include real quotes from the sources to support each perspective
+- Ensure each perspective has a clear, distinct headline
+- Avoid redundant or similar perspectives
+
+{output_instructions}
+
+Now, analyze the provided web content to identify at least 2 different perspectives on the subject.
+"""
+    return create_writer(llm, "perspectives", prompt)
+
+# Sections that must be written before another one starts. conflicting_info deduplicates its quotes
+# against these, so it has to see them in the report.
+SECTION_DEPENDENCIES = {
+    "conflicting_info": ["raw_facts", "perspectives", "timeline_items"],
+}
+
+writer_agents = {
+    "article": create_writer_agent("article"),
+    "executive_summary": create_executive_summary_agent(),
+    "timeline_items": create_writer_agent("timeline_items"),
+    "cited_sources": create_writer_agent("cited_sources"),
+    "raw_facts": create_raw_facts_agent(),
+    "perspectives": create_perspectives_agent(),
+    "conflicting_info": create_conflicting_info_agent(),
+}
+
+def _conflict_sides(conflict):
+    return [conflict.get(side) or {} for side in ('source_a', 'source_b')]
+
+def deduplicate_conflicting_quotes(conflicting_info_data, research_report):
+    """
+    Ensures quotes in conflicting_info section are different from other sections AND within itself.
+    Also prevents source reuse and source swapping.
+    Quotes are compared after normalization and with near-duplicate matching, in a single pass.
+    This function is called only for the conflicting_info agent.
+    """
+    if not conflicting_info_data or not isinstance(conflicting_info_data, list):
+        return conflicting_info_data
+    
+    # Index every quote from the other sections once
+    existing_quotes = QuoteIndex.from_report(research_report)
+    print(f"--- 🔍 FOUND {len(existing_quotes)} EXISTING QUOTES FROM OTHER SECTIONS ---")
+    
+    # Filter out conflicts that use duplicate quotes from other sections AND within conflicting_info
+    unique_conflicts = []
+    conflicting_quotes_used = QuoteIndex()  # Track quotes used within conflicting_info section
+    conflicting_sources_used = set()  # Track sources used within conflicting_info section
+    
+    for conflict in conflicting_info_data:
+        sides = _conflict_sides(conflict)
+        quotes = [side.get('quote') or '' for side in sides]
+        names = [normalize_text(side.get('name') or '') for side in sides]
+        
+        reasons = []
+        if any(existing_quotes.find(quote) for quote in quotes):
+            reasons.append("Quote found in other sections")
+        if any(conflicting_quotes_used.find(quote) for quote in quotes):
+            reasons.append("Quote already used in conflicting_info section")
+        if any(name and name in conflicting_sources_used for name in names):
+            reasons.append("Source already used in conflicting_info section")
+        
+        if reasons:
+            print(f"--- ⚠️ REMOVING CONFLICT WITH DUPLICATES ---")
+            for label, side in zip(("Source A", "Source B"), sides):
+                print(f"{label}: {side.get('name', '')} - {(side.get('quote') or '')[:50]}...")
+            for reason in reasons:
+                print(f"   Reason: {reason}")
+            continue
+        
+        unique_conflicts.append(conflict)
+        # Add these quotes and sources to the tracking indexes
+        for quote in quotes:
+            if quote:
+                conflicting_quotes_used.add(quote)
+        conflicting_sources_used.update(name for name in names if name)
+    
+    print(f"--- 📊 FINAL QUOTES USED IN CONFLICTING_INFO: {len(conflicting_quotes_used)} ---")
+    print(f"--- 📊 FINAL SOURCES USED IN CONFLICTING_INFO: {len(conflicting_sources_used)} ---")
+    return unique_conflicts
+
+def validate_conflicting_info_quotes(conflicting_info_data):
+    """
+    Manual validation function to check for duplicate quotes and sources in conflicting_info section.
+    Call this function to verify no duplicates exist.
+    """
+    if not conflicting_info_data or not isinstance(conflicting_info_data, list):
+        print("--- ❌ INVALID CONFLICTING_INFO DATA ---")
+        return False
+    
+    quotes_seen = QuoteIndex()
+    sources_seen = {}  # Normalized source name -> where it was first used
+    total_quotes = total_sources = 0
+    quote_duplicates = source_duplicates = 0
+    
+    for i, conflict in enumerate(conflicting_info_data):
+        for label, side in zip(("Source A", "Source B"), _conflict_sides(conflict)):
+            location = f"Conflict {i+1} - {label}"
+            quote = side.get('quote') or ''
+            name = side.get('name') or ''
+            if quote:
+                total_quotes += 1
+                first_use = quotes_seen.find(quote)
+                if first_use:
+                    quote_duplicates += 1
+                    print(f"--- 🚨 DUPLICATE QUOTE FOUND ---")
+                    print(f"   Quote: {quote[:100]}...")
+                    print(f"   Used in: {[first_use, location]}")
+                else:
+                    quotes_seen.add(quote, location)
+            if name:
+                total_sources += 1
+                key = normalize_text(name)
+                if key in sources_seen:
+                    source_duplicates += 1
+                    print(f"--- 🚨 DUPLICATE SOURCE FOUND ---")
+                    print(f"   Source: {name}")
+                    print(f"   Used in: {[sources_seen[key], location]}")
+                else:
+                    sources_seen[key] = location
+    
+    if quote_duplicates == 0 and source_duplicates == 0:
+        print(f"--- ✅ VALIDATION PASSED: No duplicate quotes or sources found in conflicting_info ---")
+        print(f"--- 📊 Total quotes: {total_quotes}, Unique quotes: {len(quotes_seen)} ---")
+        print(f"--- 📊 Total sources: {total_sources}, Unique sources: {len(sources_seen)} ---")
+        return True
+    print(f"--- ❌ VALIDATION FAILED: {quote_duplicates} duplicate quotes and {source_duplicates} duplicate sources found ---")
+    return False
+
+def writer_node(state: AgentState, agent_name: str):
+    print(f"--- ✍️ WRITING SECTION: {agent_name} ---")
+    agent = writer_agents[agent_name]
+    
+    # Create a message with this section's slice of the scraped data
+    section_data = (state.get('section_contexts') or {}).get(agent_name) or state['scraped_data']
+    content = f"Generate the {agent_name.replace('_', ' ')} based on the following scraped content:\n\n"
+    for item in section_data:
+        content += f"URL: {item['url']}\nContent: {item['content']}\n\n"
+    
+    messages = [HumanMessage(content=content)]
+    
+    # Only this section is asked again when its output cannot be used; the rest of the report is kept
+    for attempt in range(WRITER_MAX_RETRIES + 1):
+        result = agent.invoke({"messages": messages})
+        
+        if isinstance(result, dict):
+            # Structured output: the schema object is already parsed and validated
+            if result.get('parsed') is not None:
+                parsed_json = section_from_output(agent_name, result['parsed'])
+                print(f"--- STRUCTURED RESPONSE FOR {agent_name} PARSED ---")
+                break
+            print(f"--- ⚠️ STRUCTURED RESPONSE FOR {agent_name} DID NOT PARSE: {result.get('parsing_error')} ---")
+            result = result['raw']
+        
+        # Log the raw response from the model
+        print(f"--- RAW RESPONSE FOR {agent_name} ---")
+        print(getattr(result, 'content', str(result)))
+        print(f"--- END RAW RESPONSE FOR {agent_name} ---")
+
+        # The result from the LLM might be a string that needs parsing.
+        # It may also be inside the 'content' attribute of an AIMessage, or the arguments of a function call
+        data_str = result.content if hasattr(result, 'content') else str(result)
+        tool_calls = getattr(result, 'tool_calls', None)
+        try:
+            data = tool_calls[0]['args'] if tool_calls else extract_json(data_str)
+            parsed_json = validate_section(agent_name, data)
+            break
+        except (JSONRepairError, SectionValidationError) as e:
+            error_message = f"Error processing {agent_name}: {e}"
+            print(f"--- ❌ ERROR IN SECTION {agent_name} (ATTEMPT {attempt + 1}): {error_message} ---")
+            if attempt == WRITER_MAX_RETRIES:
+                # Return a message to be handled or logged
+                return {"messages": [HumanMessage(content=error_message)]}
+            record_retry()
+            messages = messages + [
+                AIMessage(content=data_str),
+                HumanMessage(content=f"Your previous output could not be used ({e}). "
+                                     f"Respond again with only the complete, valid JSON for the {agent_name.replace('_', ' ')} section."),
+            ]
+    
+    # Apply quote deduplication specifically for conflicting_info agent
+    if agent_name == "conflicting_info":
+        print(f"--- 🔍 APPLYING QUOTE DEDUPLICATION FOR {agent_name} ---")
+        current_research_report = state.get('research_report', {})
+        parsed_json = deduplicate_conflicting_quotes(parsed_json, current_research_report)
+        
+        # Final validation to ensure no duplicates remain
+        print(f"--- 🔍 FINAL VALIDATION FOR {agent_name} ---")
+        validate_conflicting_info_quotes(parsed_json)
+    
+    print(f"--- ✅ SECTION {agent_name} COMPLETE ---")
+    return {"research_report": {agent_name: parsed_json}}
+
+
+# --- Aggregator Node ---
+def aggregator_node(state: AgentState):
+    print("---  aggregating ALL THE DATA ---")
+    # This node is a bit of a trick. The writer nodes will update the `research_report` in the state.
+    # In a real scenario, we might need a more robust way to merge partial results.
+    # For this example, we assume each writer node adds its own key to the research_report dictionary.
+    # We will just pass the state through, and the final state will have the complete report.
+    # A final validation step could be added here.
+    print("--- ✅ AGGREGATION COMPLETE ---")
+    return {}
+
+# 4. Graph Construction
+def build_graph():
+    """Wires and compiles the research graph."""
+    workflow = StateGraph(AgentState)
+    workflow.add_node("researcher", instrument_node("research", "researcher", research_node))
+    workflow.add_node("scraper", instrument_node("research", "scraper", scraper_node))
+    workflow.add_node("context_builder", instrument_node("research", "context_builder", context_builder_node))
+    workflow.add_node("image_fetcher", instrument_node("research", "image_fetcher", image_fetcher_node))
+
+    for name in writer_agents.keys():
+        workflow.add_node(name, instrument_node("research", name, lambda state, name=name: writer_node(state, name)))
+
+    workflow.add_node("aggregator", instrument_node("research", "aggregator", aggregator_node))
+
+    workflow.add_edge(START, "researcher")
+    workflow.add_edge("researcher", "scraper")
+    workflow.add_edge("scraper", "context_builder")
+
+    # Once each writer's context slice is ready, run the writer agents in parallel;
+    # a section that needs others (see SECTION_DEPENDENCIES) waits for just those
+    terminal_sections = add_section_edges(workflow, writer_agents.keys(), SECTION_DEPENDENCIES, source="context_builder")
+
+    # Run the image fetcher after the cited_sources writer has completed
+    workflow.add_edge("cited_sources", "image_fetcher")
+
+    # After every section and the image fetcher are done, go to the aggregator
+    aggregator_inputs = [name for name in terminal_sections if name != "cited_sources"] + ["image_fetcher"]
+    workflow.add_edge(aggregator_inputs, "aggregator")
+    workflow.add_edge("aggregator", END)
+
+    return workflow.compile()
+
+_graph = None
+_graph_predecessors: Dict[str, List[str]] = {}
+_graph_lock = threading.Lock()
+
+def get_graph():
+    """The compiled research graph, built on first use (or by the warm-up hook) instead of at import."""
+    global _graph, _graph_predecessors
+    with _graph_lock:
+        if _graph is None:
+            _graph = build_graph()
+            # Used to reconstruct each run's critical path from its trace
+            _graph_predecessors = graph_predecessors(_graph)
+        return _graph
+
+def get_graph_predecessors() -> Dict[str, List[str]]:
+    get_graph()
+    return _graph_predecessors
+
+def describe_node_update(node: str, update: Optional[dict]) -> dict:
+    """Turns a graph node's state update into a JSON-friendly progress payload for streaming clients."""
+    update = update or {}
+    if update.get('research_report'):
+        return {"section": node, "data": update['research_report'].get(node)}
+    if update.get('context_stats'):
+        return {"context": update['context_stats']}
+    if 'scraped_data' in update:
+        return {"sources": [item['url'] for item in update['scraped_data']]}
+    if update.get('image_urls'):
+        return {"images": update['image_urls']}
+    if node in writer_agents and update.get('messages'):
+        return {"section": node, "error": getattr(update['messages'][-1], 'content', '')}
+    return {}
+
+def run_graph(query: str, on_event: Optional[Callable[..., None]] = None) -> ResearchReport:
+    """
+    Runs the research graph for a query and returns the assembled report.
+    When `on_event` is given it is called with every node completion as the graph streams.
+    """
+    initial_state = {"query": query, "messages": [], "scraped_data": [], "research_report": {}, "image_urls": {}, "section_contexts": {}, "context_stats": {}}
+    
+    final_report_data = {}
+    final_state = {}
+    
+    # Stream the graph so callers can follow each node as it completes
+    print("--- 🔄 EXECUTING WORKFLOW ---")
+    for mode, chunk in get_graph().stream(initial_state, {"recursion_limit": 100}, stream_mode=["updates", "values"]):
+        if mode == "values":
+            final_state = chunk
+        elif on_event:
+            for node, update in chunk.items():
+                on_event("node_completed", node=node, **describe_node_update(node, update))
+    
+    # Extract the research report from the final state
+    if final_state and 'research_report' in final_state:
+        final_report_data = final_state['research_report']
+        
+    # Merge image URLs into the final report
+    if final_state and 'image_urls' in final_state and final_state['image_urls']:
+        if 'article' in final_report_data:
+            final_report_data['article']['hero_image_url'] = final_state['image_urls']['hero_image']
+        if 'cited_sources' in final_report_data and final_state['image_urls']['source_images']:
+            for i, source in enumerate(final_report_data['cited_sources']):
+                if i < len(final_state['image_urls']['source_images']):
+                    source['image_url'] = final_state['image_urls']['source_images'][i]
+                else:
+                    source['image_url'] = "https://p-cdn.com/generic-source-logo.png"
+
+
+    print("--- 📝 ASSEMBLING FINAL REPORT ---")
+    article_id = int(uuid.uuid4().int & (1<<31)-1)
+    if 'article' in final_report_data:
+        # Generate a unique slug for the article
+        base_slug = final_report_data['article']['title'].lower().replace(' ', '-').replace('"', '')
+        slug = re.sub(r'[^a-z0-9-]', '', base_slug)
+        final_report_data['article']['slug'] = slug
+
+        final_report_data['article']['id'] = article_id
+        final_report_data['article']['read_time'] = 5
+        final_report_data['article']['source_count'] = len(final_state.get('scraped_data', []))
+        final_report_data['article']['published_at'] = "2024-01-01T00:00:00Z"
+        final_report_data['article']['category'] = "Research"
+        final_report_data['article']['author_name'] = "AI Agent"
+        final_report_data['article']['author_title'] = "Research Specialist"
+
+    for key in ['executive_summary', 'timeline_items', 'cited_sources', 'raw_facts', 'perspectives', 'conflicting_info']:
+        if key in final_report_data:
+            if isinstance(final_report_data[key], list):
+                for item in final_report_data[key]:
+                    item['article_id'] = article_id
+            else:
+                final_report_data[key]['article_id'] = article_id
+
+    try:
+        print("--- VALIDATING FINAL REPORT ---")
+        # Every section was validated as its writer finished, so the report is assembled without a second pass
+        return construct_report(final_report_data)
+        
+    except Exception as e:
+        print(f"--- ❌ FAILED TO GENERATE REPORT: {e} ---")
+        raise HTTPException(status_code=500, detail=f"Failed to generate valid report: {e}\n\n{final_report_data}")
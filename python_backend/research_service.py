@@ -0,0 +1,62 @@
+from typing import Callable, Optional
+from fastapi import HTTPException
+
+from report_store import create_report_store
+from research_cache import create_research_cache, normalize_query
+from jobs import research_jobs, ResearchJob, SchedulerSaturated
+from metrics import start_trace, critical_path
+from startup import lazy_import
+
+
+# Research runs as a service both routers share: the report store, the query cache and job submission.
+# The graph itself (research_graph.py) is only imported when a run starts.
+
+# --- Report Store ---
+# Generated reports are stored by slug in a bounded memory tier backed by a store shared across workers
+report_store = create_report_store()
+# Recently researched queries map to their report's slug so repeats skip the whole pipeline
+research_cache = create_research_cache(report_store)
+
+def research_pipeline():
+    """The research graph module, imported on first use."""
+    return lazy_import("research_graph")
+
+def run_research(query: str, on_event: Optional[Callable[..., None]] = None, trace_id: Optional[str] = None) -> str:
+    """
+    Runs the research graph for a query, caches the validated report and returns its slug.
+    When `on_event` is given it is called with every node completion as the graph streams.
+    Node timings and token usage are recorded on the trace `trace_id` (a new one if omitted).
+    """
+    pipeline = research_pipeline()
+    with start_trace("research", trace_id) as trace:
+        trace.attributes["query"] = query
+        try:
+            validated_report = pipeline.run_graph(query, on_event)
+        finally:
+            path = critical_path(trace, pipeline.get_graph_predecessors())
+            trace.attributes["critical_path"] = path
+            print("--- ⏱️ CRITICAL PATH: " + " → ".join(f"{step['node']} ({step['duration_seconds']:.2f}s)" for step in path) + " ---")
+
+        # Store the full report so any worker can serve it
+        report_slug = validated_report.article.slug
+        report_store.put(report_slug, validated_report)
+        research_cache.remember(query, report_slug)
+        
+        print(f"--- ✅ REPORT GENERATED AND STORED. SLUG: {report_slug} ---")
+        return report_slug
+
+def enqueue_research(query: str, queue: str = "interactive") -> ResearchJob:
+    """Queues a research job, joining an identical in-flight one. Raises SchedulerSaturated when the queue is full."""
+    return research_jobs.submit(run_research, query, queue=queue, key=normalize_query(query))
+
+def submit_research(query: str) -> ResearchJob:
+    """Queues an interactive research job, joining an identical in-flight one. Answers 429 when the queue is full."""
+    try:
+        return enqueue_research(query)
+    except SchedulerSaturated as e:
+        print(f"--- 🚦 RESEARCH QUEUE SATURATED: {e} ---")
+        raise HTTPException(
+            status_code=429,
+            detail={"message": str(e), "running": e.in_flight, "queued": e.pending},
+            headers={"Retry-After": "30"},
+        )
@@ -0,0 +1,66 @@
+import os
+import gzip
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+# --- Precomputed Response Configuration ---
+# Bodies smaller than this are not worth compressing; the gzip level trades CPU at build time for bytes on the wire
+RESPONSE_GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "512"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+
+
+class PrecomputedBody:
+    """
+    A response body serialized and compressed once, with a content-hash ETag, so serving it
+    is a header comparison plus handing over bytes that already exist.
+    """
+
+    __slots__ = ("body", "gzip_body", "etag", "media_type")
+
+    def __init__(self, body: bytes, media_type: str = "application/json", gzip_body: Optional[bytes] = None):
+        self.body = body
+        self.media_type = media_type
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if gzip_body is None and len(body) >= RESPONSE_GZIP_MIN_BYTES:
+            gzip_body = gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+        self.gzip_body = gzip_body
+
+    def __len__(self) -> int:
+        return len(self.body) + len(self.gzip_body or b"")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers this ETag (weak comparison, lists and "*" included)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def precomputed_response(request: Request, precomputed: PrecomputedBody, cache_control: str = "no-cache") -> Response:
+    """304 when the client already has this body, else the stored bytes (gzip when the client accepts it)."""
+    headers = {"ETag": precomputed.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), precomputed.etag):
+        return Response(status_code=304, headers=headers)
+    if precomputed.gzip_body is not None and accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=precomputed.gzip_body, media_type=precomputed.media_type, headers=headers)
+    return Response(content=precomputed.body, media_type=precomputed.media_type, headers=headers)
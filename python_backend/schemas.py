@@ -61,6 +61,22 @@ class Perspective(CamelCaseModel):
     conflict_quote: Optional[str] = None
     conflict_url: Optional[str] = None
 
+class ConflictSource(CamelCaseModel):
+    name: str
+    quote: str
+    url: Optional[str] = None
+    claim: Optional[str] = None
+
+class ConflictingInfo(CamelCaseModel):
+    article_id: int
+    conflict_id: str
+    conflict_type: str
+    conflict_description: str
+    source_a: ConflictSource
+    source_b: ConflictSource
+    resolution_status: Optional[str] = None
+    severity: Optional[str] = None
+
 class ResearchReport(CamelCaseModel):
     article: Article
     executive_summary: ExecutiveSummary
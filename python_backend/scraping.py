@@ -0,0 +1,344 @@
+import os
+import re
+import json
+import codecs
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional
+
+import requests
+import charset_normalizer
+from requests.adapters import HTTPAdapter
+
+from search import domain_of
+
+
+# --- Scraping Engine Configuration ---
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+SCRAPE_MAX_PER_HOST = int(os.getenv("SCRAPE_MAX_PER_HOST", "2"))
+SCRAPE_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_TIMEOUT_SECONDS", "10"))
+# Bodies are streamed and abandoned after this many bytes
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(1024 * 1024)))
+# Extracted text kept per page
+SCRAPE_MAX_CHARS = int(os.getenv("SCRAPE_MAX_CHARS", "4000"))
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "http_cache"))
+# Cached pages younger than this are served without revalidating against the origin
+SCRAPE_CACHE_FRESH_SECONDS = float(os.getenv("SCRAPE_CACHE_FRESH_SECONDS", "3600"))
+# The cache keeps at most this many pages, and none written longer ago than the max age; the oldest are
+# deleted as new ones are written (0 turns either limit off)
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "5000"))
+SCRAPE_CACHE_MAX_AGE_SECONDS = float(os.getenv("SCRAPE_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 60 * 60)))
+# The scraper node fetches full text for this many of the best-ranked search results, waiting at most this long
+SCRAPE_ENRICH_TOP_K = int(os.getenv("SCRAPE_ENRICH_TOP_K", "5"))
+SCRAPE_ENRICH_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_ENRICH_TIMEOUT_SECONDS", "8"))
+SCRAPE_USER_AGENT = os.getenv("SCRAPE_USER_AGENT", "Mozilla/5.0 (compatible; WebAIResearchBot/1.0)")
+
+_HEADER_CHARSET = re.compile(r"""charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+# Bytes of the body inspected for a <meta charset> and for content sniffing
+_SNIFF_BYTES = 4096
+# Listing the cache directory is not free, so writes prune it at most this often
+_CACHE_PRUNE_INTERVAL_SECONDS = 60
+
+
+def _is_utf8(head: bytes) -> bool:
+    """Whether the bytes are valid UTF-8, allowing a multibyte character cut off at the end."""
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _sniff_encoding(head: bytes) -> Optional[str]:
+    best = charset_normalizer.from_bytes(head).best()
+    return best.encoding if best is not None else None
+
+
+class ScrapeError(Exception):
+    """Raised when a page cannot be fetched or has no readable text."""
+
+
+class MainContentExtractor(HTMLParser):
+    """
+    Streaming main-content extractor. Text is collected from block elements while boilerplate regions
+    (navigation, headers, footers, scripts, forms) are skipped; content inside <article>/<main> is preferred.
+    No DOM is built, so the parser can stop as soon as it has enough text.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe", "template", "button", "select"}
+    BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "li", "blockquote", "pre", "td", "figcaption"}
+    MAIN_TAGS = {"article", "main"}
+    VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr", "area", "base", "col", "embed", "param", "track"}
+
+    def __init__(self, max_chars: int = SCRAPE_MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.main_blocks: List[str] = []
+        self.other_blocks: List[str] = []
+        self.main_chars = 0
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._block_depth = 0
+        self._buffer: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self.main_chars >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            return
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.MAIN_TAGS:
+            self._main_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            if self._block_depth == 0:
+                self._buffer = []
+            self._block_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.MAIN_TAGS:
+            self._main_depth = max(0, self._main_depth - 1)
+        elif tag in self.BLOCK_TAGS and self._block_depth:
+            self._block_depth -= 1
+            if self._block_depth == 0:
+                self._flush_block(tag)
+
+    def handle_data(self, data):
+        if self._block_depth and not self._skip_depth:
+            self._buffer.append(data)
+
+    def _flush_block(self, tag: str):
+        text = " ".join("".join(self._buffer).split())
+        self._buffer = []
+        # Very short paragraphs are mostly bylines, share prompts and cookie notices
+        if not text or (tag in ("p", "li", "td") and len(text) < 40):
+            return
+        if self._main_depth:
+            self.main_blocks.append(text)
+            self.main_chars += len(text)
+        else:
+            self.other_blocks.append(text)
+
+    def text(self) -> str:
+        blocks = self.main_blocks if self.main_chars >= 200 else self.main_blocks + self.other_blocks
+        return "\n".join(blocks)[:self.max_chars]
+
+
+def extract_main_content(chunks: Iterable[str], max_chars: int = SCRAPE_MAX_CHARS) -> str:
+    """Feeds decoded HTML chunks to the extractor, stopping early once enough main content has been seen."""
+    extractor = MainContentExtractor(max_chars)
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+    extractor.close()
+    return extractor.text()
+
+
+class HTTPCache:
+    """
+    On-disk cache of extracted page text keyed by URL, with the validators (ETag/Last-Modified)
+    needed to revalidate it with a conditional GET.
+    """
+
+    def __init__(self, directory: str = SCRAPE_CACHE_DIR, max_entries: int = SCRAPE_CACHE_MAX_ENTRIES,
+                 max_age_seconds: float = SCRAPE_CACHE_MAX_AGE_SECONDS):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(directory, exist_ok=True)
+        self._last_pruned = 0.0
+        self._prune_lock = threading.Lock()
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict[str, object]]:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, url: str, entry: Dict[str, object]):
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        # Atomic replace so concurrent workers never read a half-written entry
+        os.replace(tmp_path, path)
+        self._maybe_prune()
+
+    def _maybe_prune(self):
+        with self._prune_lock:
+            now = time.time()
+            if now - self._last_pruned < _CACHE_PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_pruned = now
+        self.prune()
+
+    def prune(self):
+        """Deletes entries older than the max age, then the least recently written ones beyond the entry cap."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+        entries.sort()
+        expired = 0
+        if self.max_age_seconds > 0:
+            cutoff = time.time() - self.max_age_seconds
+            while expired < len(entries) and entries[expired][0] < cutoff:
+                expired += 1
+        overflow = len(entries) - self.max_entries if self.max_entries > 0 else 0
+        for _, path in entries[:max(expired, overflow)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another worker pruned it first
+                continue
+
+
+class ScrapingEngine:
+    """Fetches pages over a shared keep-alive pool with global and per-host concurrency limits."""
+
+    def __init__(self, concurrency: int = SCRAPE_CONCURRENCY, max_per_host: int = SCRAPE_MAX_PER_HOST,
+                 cache: Optional[HTTPCache] = None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=max_per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = SCRAPE_USER_AGENT
+        self.session.headers["Accept"] = "text/html,application/xhtml+xml,text/plain;q=0.9"
+        self.max_per_host = max_per_host
+        self.cache = cache or HTTPCache()
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_limits_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scrape")
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = domain_of(url)
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def fetch_text(self, url: str) -> str:
+        """Main text of a page, from the disk cache when it is fresh or still valid. Raises ScrapeError."""
+        cached = self.cache.get(url)
+        if cached and time.time() - cached.get("fetched_at", 0) < SCRAPE_CACHE_FRESH_SECONDS:
+            return cached["text"]
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        with self._host_limit(url):
+            try:
+                response = self.session.get(url, headers=headers, timeout=SCRAPE_TIMEOUT_SECONDS, stream=True)
+            except requests.RequestException as e:
+                raise ScrapeError(str(e))
+            try:
+                if response.status_code == 304 and cached:
+                    cached["fetched_at"] = time.time()
+                    self.cache.set(url, cached)
+                    return cached["text"]
+                try:
+                    response.raise_for_status()
+                except requests.RequestException as e:
+                    raise ScrapeError(str(e))
+                content_type = response.headers.get("Content-Type", "text/html")
+                if "html" not in content_type and "text/plain" not in content_type:
+                    raise ScrapeError(f"Unsupported content type: {content_type}")
+                try:
+                    text = extract_main_content(self._decoded_chunks(response, content_type))
+                except (requests.RequestException, UnicodeError, LookupError) as e:
+                    # The body streams in here, so truncated transfers and read timeouts surface now
+                    raise ScrapeError(f"Could not read body: {e}")
+            finally:
+                response.close()
+
+        if not text:
+            raise ScrapeError("No readable text found")
+        self.cache.set(url, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "text": text,
+        })
+        return text
+
+    @staticmethod
+    def _detect_encoding(content_type: str, head: bytes) -> str:
+        """Charset from the Content-Type header, then the page's <meta charset>, then sniffed from the bytes (UTF-8 first)."""
+        candidates = []
+        header = _HEADER_CHARSET.search(content_type)
+        if header:
+            candidates.append(header.group(1))
+        meta = _META_CHARSET.search(head[:_SNIFF_BYTES])
+        if meta:
+            candidates.append(meta.group(1).decode("ascii", errors="ignore"))
+        if head:
+            candidates.append("utf-8" if _is_utf8(head[:_SNIFF_BYTES]) else _sniff_encoding(head[:_SNIFF_BYTES]))
+        for candidate in candidates:
+            if not candidate:
+                continue
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                # Unknown or misspelled charset names fall through to the next source
+                continue
+        return "utf-8"
+
+    @classmethod
+    def _decoded_chunks(cls, response: requests.Response, content_type: str) -> Iterable[str]:
+        chunks = response.iter_content(chunk_size=16384, decode_unicode=False)
+        # The encoding is chosen from the start of the body, so buffer enough of it to sniff
+        head = b""
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= _SNIFF_BYTES:
+                break
+        # An incremental decoder keeps multibyte characters that straddle chunk boundaries intact
+        decoder = codecs.getincrementaldecoder(cls._detect_encoding(content_type, head))(errors="replace")
+        received = len(head)
+        yield decoder.decode(head)
+        if received < SCRAPE_MAX_BYTES:
+            for chunk in chunks:
+                received += len(chunk)
+                yield decoder.decode(chunk)
+                if received >= SCRAPE_MAX_BYTES:
+                    break
+            else:
+                yield decoder.decode(b"", final=True)
+
+    def fetch_many(self, urls: List[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """Fetches pages concurrently. Returns text for every URL that succeeded within `timeout` seconds."""
+        futures = {self._executor.submit(self.fetch_text, url): url for url in dict.fromkeys(urls)}
+        done, _ = wait(futures, timeout=timeout)
+        texts = {}
+        for future in done:
+            try:
+                texts[futures[future]] = future.result()
+            except Exception as e:
+                # One bad page only loses its own text, never the whole batch
+                print(f"--- ⚠️ COULD NOT SCRAPE {futures[future]}: {e} ---")
+        return texts
+
+
+scraping_engine = ScrapingEngine()
@@ -0,0 +1,130 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# --- Search Fan-out Configuration ---
+# Searches issued at the same time for one report
+SEARCH_MAX_PARALLEL = int(os.getenv("SEARCH_MAX_PARALLEL", "4"))
+# Upper bound on distinct queries per report (model-requested queries plus generated variants)
+SEARCH_MAX_QUERIES = int(os.getenv("SEARCH_MAX_QUERIES", "6"))
+# Merged results handed to the writers, and how many of them may come from one domain
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "15"))
+SEARCH_MAX_PER_DOMAIN = int(os.getenv("SEARCH_MAX_PER_DOMAIN", "3"))
+
+# Prioritize primary sources: government sites, official documents, direct statements
+PRIMARY_SOURCE_SUFFIX = " site:gov OR site:congress.gov OR site:whitehouse.gov OR site:govinfo.gov OR official statement OR primary source"
+# Surface coverage that disagrees with the mainstream framing
+OPPOSING_PERSPECTIVE_SUFFIX = " criticism OR critics say OR opposing view OR disputed"
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid", "ocid")
+
+
+def parse_search_results(results: Any) -> List[Dict[str, Any]]:
+    """Normalizes the different shapes TavilySearch may return (list, dict with 'results', JSON string)."""
+    if isinstance(results, str):
+        try:
+            results = json.loads(results)
+        except json.JSONDecodeError:
+            print(f"--- ⚠️ COULD NOT PARSE TAVILY RESULTS AS JSON: {results[:100]}... ---")
+            return []
+    if isinstance(results, dict):
+        results = results.get('results', [])
+    if not isinstance(results, list):
+        print(f"--- ⚠️ UNEXPECTED TAVILY RESULTS TYPE: {type(results)} ---")
+        return []
+    valid = []
+    for res in results:
+        if isinstance(res, dict) and 'url' in res and 'content' in res:
+            valid.append(res)
+        else:
+            print(f"--- ⚠️ SKIPPING INVALID RESULT FORMAT: {type(res)} ---")
+    return valid
+
+
+def canonicalize_url(url: str) -> str:
+    """Collapses URL variants of the same page: scheme, www., fragments, tracking parameters and trailing slashes."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def domain_of(url: str) -> str:
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def build_search_queries(requested: List[str], topic: str) -> List[str]:
+    """
+    Every query the model asked for, each aimed at primary sources, plus the plain topic and an
+    opposing-perspective variant so the writers see more than one side. Duplicates are dropped.
+    """
+    requested = [query for query in requested if query] or [topic]
+    queries = [query + PRIMARY_SOURCE_SUFFIX for query in requested]
+    queries += [topic, topic + OPPOSING_PERSPECTIVE_SUFFIX]
+    return list(dict.fromkeys(queries))[:SEARCH_MAX_QUERIES]
+
+
+def run_searches(search_tool: Any, queries: List[str], max_parallel: int = SEARCH_MAX_PARALLEL) -> List[List[Dict[str, Any]]]:
+    """Runs all queries concurrently. A failed search yields an empty list instead of failing the report."""
+
+    def search(query: str) -> List[Dict[str, Any]]:
+        print(f"--- EXECUTING TAVILY SEARCH for: {query} ---")
+        try:
+            return parse_search_results(search_tool.invoke(query))
+        except Exception as e:
+            print(f"--- ⚠️ TAVILY SEARCH FAILED for {query}: {e} ---")
+            return []
+
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(queries))), thread_name_prefix="search") as executor:
+        return list(executor.map(search, queries))
+
+
+def merge_results(result_lists: List[List[Dict[str, Any]]], max_results: int = SEARCH_MAX_RESULTS,
+                  max_per_domain: int = SEARCH_MAX_PER_DOMAIN) -> List[Dict[str, Any]]:
+    """
+    Merges several result lists into one ranking: duplicates (by canonical URL) keep their best score,
+    and no domain may take more than `max_per_domain` slots unless there is nothing else to fill them with.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, res in enumerate(results):
+            key = canonicalize_url(res['url'])
+            score = res.get('score')
+            score = float(score) if isinstance(score, (int, float)) else 1.0 / (rank + 1)
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = {**res, "score": score, "hits": 1}
+                continue
+            existing['hits'] += 1
+            if score > existing['score']:
+                existing['score'] = score
+            if len(res.get('content') or "") > len(existing.get('content') or ""):
+                existing['content'] = res['content']
+
+    # A page that several queries found is a stronger result
+    ranked = sorted(merged.values(), key=lambda res: res['score'] + 0.05 * (res['hits'] - 1), reverse=True)
+
+    selected = []
+    overflow = []
+    per_domain: Dict[str, int] = {}
+    for res in ranked:
+        domain = domain_of(res['url'])
+        if per_domain.get(domain, 0) >= max_per_domain:
+            overflow.append(res)
+            continue
+        per_domain[domain] = per_domain.get(domain, 0) + 1
+        selected.append(res)
+    selected.extend(overflow[:max(0, max_results - len(selected))])
+    return selected[:max_results]
@@ -0,0 +1,57 @@
+from typing import Dict, Iterable, List
+
+from langgraph.graph import StateGraph
+
+
+def topological_order(sections: Iterable[str], dependencies: Dict[str, List[str]]) -> List[str]:
+    """Sections ordered so each comes after everything it depends on. Raises ValueError on unknown sections or cycles."""
+    sections = list(sections)
+    known = set(sections)
+    for section, needs in dependencies.items():
+        unknown = [name for name in [section, *needs] if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown sections in dependencies of '{section}': {unknown}")
+
+    order: List[str] = []
+    state: Dict[str, str] = {}
+
+    def visit(section: str, chain: List[str]):
+        if state.get(section) == "done":
+            return
+        if state.get(section) == "visiting":
+            raise ValueError(f"Section dependency cycle: {' -> '.join(chain + [section])}")
+        state[section] = "visiting"
+        for dependency in dependencies.get(section, []):
+            visit(dependency, chain + [section])
+        state[section] = "done"
+        order.append(section)
+
+    for section in sections:
+        visit(section, [])
+    return order
+
+
+def add_section_edges(workflow: StateGraph, sections: Iterable[str], dependencies: Dict[str, List[str]],
+                      source: str) -> List[str]:
+    """
+    Wires writer sections into the graph: sections without dependencies start straight after `source`,
+    and a dependent section waits for exactly the sections it lists (a join edge), so everything else
+    stays parallel. Returns the terminal sections, the ones no other section waits for.
+    """
+    order = topological_order(sections, dependencies)
+    for section in order:
+        needs = dependencies.get(section)
+        if needs:
+            workflow.add_edge(list(needs), section)
+        else:
+            workflow.add_edge(source, section)
+    depended_on = {dependency for needs in dependencies.values() for dependency in needs}
+    return [section for section in order if section not in depended_on]
+
+
+def graph_predecessors(compiled_graph) -> Dict[str, List[str]]:
+    """Node -> nodes with an edge into it, read from a compiled graph (used to reconstruct critical paths)."""
+    predecessors: Dict[str, List[str]] = {}
+    for edge in compiled_graph.get_graph().edges:
+        predecessors.setdefault(edge.target, []).append(edge.source)
+    return predecessors
@@ -0,0 +1,145 @@
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError, create_model
+
+from schemas import (Article, ExecutiveSummary, TimelineItem, CitedSource, RawFacts, Perspective, ConflictingInfo,
+                     ResearchReport)
+
+
+class SectionValidationError(ValueError):
+    """Raised when a writer's output does not match its section schema."""
+
+
+def draft_model(model: Type[BaseModel], exclude: Iterable[str] = (), optional: Iterable[str] = ()) -> Type[BaseModel]:
+    """
+    The part of a report model a writer is responsible for. Fields filled in while assembling the report
+    (ids, slugs, images) are left out, and `optional` fields may be omitted by the writer.
+    """
+    exclude, optional = set(exclude), set(optional)
+    fields: Dict[str, Any] = {}
+    for name, field in model.model_fields.items():
+        if name in exclude:
+            continue
+        if name in optional:
+            fields[name] = (Optional[field.annotation], None)
+        else:
+            fields[name] = (field.annotation, field)
+    return create_model(f"{model.__name__}Draft", __base__=model.__base__, **fields)
+
+
+ArticleDraft = draft_model(
+    Article,
+    exclude=("id", "slug", "category", "published_at", "read_time", "source_count", "author_name", "author_title"),
+    optional=("hero_image_url",),
+)
+ExecutiveSummaryDraft = draft_model(ExecutiveSummary, exclude=("article_id",))
+TimelineItemDraft = draft_model(TimelineItem, exclude=("article_id",))
+CitedSourceDraft = draft_model(CitedSource, exclude=("article_id", "image_url"))
+RawFactsDraft = draft_model(RawFacts, exclude=("article_id",))
+PerspectiveDraft = draft_model(Perspective, exclude=("article_id",))
+ConflictingInfoDraft = draft_model(ConflictingInfo, exclude=("article_id",))
+
+# Section name -> (draft model, whether the writer returns a list of them)
+SECTION_SCHEMAS: Dict[str, Any] = {
+    "article": (ArticleDraft, False),
+    "executive_summary": (ExecutiveSummaryDraft, False),
+    "timeline_items": (TimelineItemDraft, True),
+    "cited_sources": (CitedSourceDraft, True),
+    "raw_facts": (RawFactsDraft, True),
+    "perspectives": (PerspectiveDraft, True),
+    "conflicting_info": (ConflictingInfoDraft, True),
+}
+
+# Report fields built from writer sections, with the full model each one becomes
+REPORT_SECTION_MODELS: Dict[str, Any] = {
+    "article": (Article, False),
+    "executive_summary": (ExecutiveSummary, False),
+    "timeline_items": (TimelineItem, True),
+    "cited_sources": (CitedSource, True),
+    "raw_facts": (RawFacts, True),
+    "perspectives": (Perspective, True),
+}
+
+
+def _output_model(section: str) -> Type[BaseModel]:
+    model, many = SECTION_SCHEMAS[section]
+    if not many:
+        return model
+    # Structured output has to be a JSON object, so list sections are wrapped in one
+    return create_model(f"{model.__name__}List", __base__=BaseModel, items=(List[model], ...))
+
+
+SECTION_OUTPUT_MODELS: Dict[str, Type[BaseModel]] = {section: _output_model(section) for section in SECTION_SCHEMAS}
+
+
+def section_from_output(section: str, output: BaseModel) -> Any:
+    """Converts a parsed structured-output object into the section's plain snake_case data."""
+    _, many = SECTION_SCHEMAS[section]
+    if many:
+        return [item.model_dump() for item in output.items]
+    return output.model_dump()
+
+
+def _unwrap(section: str, data: Any, many: bool) -> Any:
+    # Models sometimes wrap the expected value, e.g. {"timeline_items": [...]} or [{...}] for a single object
+    if many and isinstance(data, dict):
+        if isinstance(data.get(section), list):
+            return data[section]
+        lists = [value for value in data.values() if isinstance(value, list)]
+        if len(lists) == 1 and len(data) == 1:
+            return lists[0]
+        return [data]
+    if not many and isinstance(data, list) and len(data) == 1:
+        return data[0]
+    if not many and isinstance(data, dict) and isinstance(data.get(section), dict):
+        return data[section]
+    return data
+
+
+def validate_section(section: str, data: Any) -> Any:
+    """
+    Checks a writer's parsed output against its section schema and returns it normalized to snake_case.
+    Invalid items of a list section are dropped; the section only fails if none of them are usable.
+    Raises SectionValidationError.
+    """
+    model, many = SECTION_SCHEMAS[section]
+    data = _unwrap(section, data, many)
+
+    if not many:
+        if not isinstance(data, dict):
+            raise SectionValidationError(f"Expected a JSON object for {section}, got {type(data).__name__}")
+        try:
+            return model.model_validate(data).model_dump()
+        except ValidationError as e:
+            raise SectionValidationError(str(e))
+
+    if not isinstance(data, list):
+        raise SectionValidationError(f"Expected a JSON array for {section}, got {type(data).__name__}")
+    items, errors = [], []
+    for item in data:
+        if not isinstance(item, dict):
+            errors.append(f"item is {type(item).__name__}, not an object")
+        else:
+            try:
+                items.append(model.model_validate(item).model_dump())
+            except ValidationError as e:
+                errors.append(str(e))
+    if data and not items:
+        raise SectionValidationError(f"No valid items in {section}: {errors[0]}")
+    if errors:
+        print(f"--- ⚠️ DROPPED {len(errors)} INVALID ITEMS FROM {section} ---")
+    return items
+
+
+def construct_report(data: Dict[str, Any]) -> ResearchReport:
+    """
+    Builds the report from sections that already passed validate_section, without validating them again.
+    A missing section falls back to full validation so the caller gets the usual error.
+    """
+    if any(section not in data for section in REPORT_SECTION_MODELS):
+        return ResearchReport.model_validate(data)
+    fields = {}
+    for section, (model, many) in REPORT_SECTION_MODELS.items():
+        value = data[section]
+        fields[section] = [model.model_construct(**item) for item in value] if many else model.model_construct(**value)
+    return ResearchReport.model_construct(**fields)
@@ -0,0 +1,72 @@
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, so each worker refreshes on its own
+    fcntl = None
+
+
+class SharedSnapshot:
+    """
+    A JSON document on local disk shared by every worker process on the host, plus an exclusive
+    lock (flock on a sidecar file) that elects the one process allowed to regenerate it at a time.
+    The OS drops the lock when its holder exits, so a crashed worker never blocks the others.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._loaded_mtime: Optional[int] = None
+
+    def read_if_changed(self) -> Optional[Dict[str, Any]]:
+        """The document if it was written since the last read, else None (one stat call when unchanged)."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime == self._loaded_mtime:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"--- ⚠️ COULD NOT READ SHARED SNAPSHOT {self.path}: {e} ---")
+            return None
+        self._loaded_mtime = mtime
+        return document
+
+    def write(self, document: Dict[str, Any]):
+        """Replaces the document atomically, so readers see either the old or the new version."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(document, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._loaded_mtime = os.stat(self.path).st_mtime_ns
+
+    @contextmanager
+    def exclusive(self, blocking: bool = True) -> Iterator[bool]:
+        """Holds the cross-process lock for the block. Yields False if `blocking` is off and another process has it."""
+        if fcntl is None:
+            yield True
+            return
+        with open(self.lock_path, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
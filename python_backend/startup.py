@@ -0,0 +1,94 @@
+import os
+import re
+import sys
+import time
+import argparse
+import importlib
+import threading
+import subprocess
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# --- Startup Configuration ---
+# Build the research graph and the hot topics workflow in the background as soon as the app starts,
+# instead of on the first request that needs them
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "false").lower() in ("1", "true", "yes")
+
+_process_started = time.monotonic()
+_load_times: Dict[str, float] = {}
+_load_lock = threading.Lock()
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def uptime_seconds() -> float:
+    return time.monotonic() - _process_started
+
+
+def lazy_import(name: str):
+    """Imports a heavy module on first use, recording how long the import took."""
+    if name not in _load_times:
+        with _load_lock:
+            if name not in _load_times:
+                started = time.perf_counter()
+                importlib.import_module(name)
+                _load_times[name] = time.perf_counter() - started
+                print(f"--- 📦 LOADED {name} IN {_load_times[name]:.2f}s ---")
+    return sys.modules[name]
+
+
+def loaded_modules() -> Dict[str, float]:
+    """Lazily imported modules loaded so far, with their import time in seconds."""
+    return {name: round(seconds, 3) for name, seconds in _load_times.items()}
+
+
+def run_in_background(*steps: Callable[[], None]) -> threading.Thread:
+    """Runs startup steps one after another on a daemon thread, so the server answers while they run."""
+    def run():
+        for step in steps:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                print(f"--- ❌ STARTUP STEP {step.__name__} FAILED: {e} ---")
+                continue
+            print(f"--- 🔥 {step.__name__} DONE IN {time.perf_counter() - started:.2f}s ---")
+
+    thread = threading.Thread(target=run, name="startup", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_profile(target: str = "main") -> List[Tuple[str, float, float]]:
+    """
+    Imports `target` in a fresh interpreter under `-X importtime` and returns the top-level imports
+    it triggered as (module, self seconds, cumulative seconds), slowest first.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # Depth 0 is the target itself, depth 1 is what it imports directly
+        if match and len(match.group(3)) <= 3:
+            rows.append((match.group(4), int(match.group(1)) / 1e6, int(match.group(2)) / 1e6))
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def main_cli(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Import-time profile of a backend module.")
+    parser.add_argument("module", nargs="?", default="main", help="module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="rows to print")
+    args = parser.parse_args(argv)
+
+    rows = import_profile(args.module)
+    width = max(len("module"), *(len(row[0]) for row in rows[:args.top]))
+    print(f"{'module'.ljust(width)}  self_ms    cumulative_ms")
+    for module, own, cumulative in rows[:args.top]:
+        print(f"{module.ljust(width)}  {own * 1000:<9.1f}  {cumulative * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    main_cli()
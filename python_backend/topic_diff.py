@@ -0,0 +1,90 @@
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from dedup import NearDuplicateIndex, normalize_text, shingles, containment
+from event_ranking import EVENT_DUPLICATE_THRESHOLD, parse_published_at
+from search import canonicalize_url
+
+
+# --- Incremental Refresh Configuration ---
+# Topics whose story has not been seen in any refresh for this long are dropped from the feed
+HOT_TOPICS_TOPIC_TTL_SECONDS = float(os.getenv("HOT_TOPICS_TOPIC_TTL_SECONDS", str(24 * 60 * 60)))
+HOT_TOPICS_MAX_TOPICS = int(os.getenv("HOT_TOPICS_MAX_TOPICS", "8"))
+
+# Characters of the summary that identify a story; the lead carries it
+_SUMMARY_CHARS = 300
+
+
+def event_identity(event: Dict[str, Any]) -> Dict[str, str]:
+    """What a topic remembers about the event behind it, so later refreshes can recognize the same story."""
+    return {
+        "event_key": canonicalize_url(event["url"]) if event.get("url") else "",
+        "event_text": f"{event.get('title', '')} {(event.get('summary') or '')[:_SUMMARY_CHARS]}",
+    }
+
+
+def _same_story_text(a: str, b: str) -> bool:
+    return containment(shingles(normalize_text(a)), shingles(normalize_text(b))) >= EVENT_DUPLICATE_THRESHOLD
+
+
+def diff_events(events: List[Dict[str, Any]], previous_topics: List[Dict[str, Any]],
+                now: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Splits freshly ranked events against the current topics:
+    - kept: existing topics whose story is still running unchanged (same URL or a near-duplicate text),
+    - pending: events that need a topic written, either new stories or a known URL whose text changed
+      materially (those carry the existing `topic_id` and `image_url` so the topic keeps its identity,
+      and the whole `previous_topic` to fall back on if no new topic gets written),
+    - carried: existing topics not seen this time that have not expired yet.
+    """
+    now = now or datetime.now(timezone.utc)
+    by_key = {topic["event_key"]: topic for topic in previous_topics if topic.get("event_key")}
+    index = NearDuplicateIndex(EVENT_DUPLICATE_THRESHOLD)
+    for position, topic in enumerate(previous_topics):
+        if topic.get("event_text"):
+            index.add(topic["event_text"], position)
+
+    kept, pending, matched = [], [], set()
+    for event in events:
+        identity = event_identity(event)
+        topic = by_key.get(identity["event_key"]) if identity["event_key"] else None
+        if topic is not None and id(topic) not in matched:
+            matched.add(id(topic))
+            if _same_story_text(topic.get("event_text", ""), identity["event_text"]):
+                kept.append({**topic, "last_seen_at": now.isoformat()})
+            else:
+                pending.append({**event, "topic_id": topic.get("id"), "image_url": topic.get("image_url"),
+                                "previous_topic": topic})
+            continue
+        position = index.find(identity["event_text"])
+        if position is not None and id(previous_topics[position]) not in matched:
+            matched.add(id(previous_topics[position]))
+            kept.append({**previous_topics[position], "last_seen_at": now.isoformat()})
+            continue
+        if position is None:
+            pending.append(event)
+
+    carried = []
+    for topic in previous_topics:
+        if id(topic) in matched:
+            continue
+        last_seen = parse_published_at(topic.get("last_seen_at") or topic.get("generated_at"))
+        if last_seen is not None and (now - last_seen).total_seconds() <= HOT_TOPICS_TOPIC_TTL_SECONDS:
+            carried.append(topic)
+    return kept, pending, carried
+
+
+def unwritten_topics(pending: List[Dict[str, Any]], written: List[Dict[str, Any]],
+                     now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Existing topics of changed stories that got no new topic (the generator skipped them or its output
+    could not be parsed). They stay in the feed as they were rather than disappearing with the change.
+    """
+    now = now or datetime.now(timezone.utc)
+    written_ids = {topic.get("id") for topic in written if topic.get("id")}
+    return [
+        {**event["previous_topic"], "last_seen_at": now.isoformat()}
+        for event in pending
+        if event.get("previous_topic") and event.get("topic_id") not in written_ids
+    ]